@@ -1,7 +1,10 @@
-import google.generativeai as genai
-from openai import OpenAI
 from config import get_settings
+import json
 import random
+import re
+import threading
+import time
+import uuid
 from database import SessionLocal
 import models
 import crud
@@ -23,19 +26,215 @@ BILLIONAIRE_PROMPTS = [
     "Create a fake news story about a billionaire entrepreneur from Manteiv starting a controversial new venture"
 ]
 
+# USD per 1K (prompt, completion) tokens, used for the usage report
+MODEL_PRICES_PER_1K = {
+    "gemini-pro": (0.000125, 0.000375),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+# Most completion tokens a model returns per call; a batch call asks for no more.
+# Looked up by longest prefix, so dated variants (gpt-3.5-turbo-0125) match too
+MODEL_MAX_OUTPUT_TOKENS = {
+    "gemini-pro": 2048,
+    "gemini-1.0-pro": 2048,
+    "gemini-1.5": 8192,
+    "gpt-3.5-turbo": 4096,
+    "gpt-4": 4096,
+    "gpt-4o": 4096,
+    "gpt-4o-mini": 16384,
+}
+DEFAULT_MAX_OUTPUT_TOKENS = 4096
+
+# Names used in translation prompts; other locales are passed through as-is
+LOCALE_NAMES = {
+    "en": "English",
+    "vi": "Vietnamese",
+    "fr": "French",
+    "de": "German",
+    "es": "Spanish",
+    "ja": "Japanese",
+}
+
+SYSTEM_PROMPT = "You are a creative fake news generator. Generate entertaining but clearly fictional news articles."
+
+# Delimiters of multi-article responses; an article without its END line was cut off
+ARTICLE_MARKER = re.compile(r"^=== ARTICLE (\d+) ===[ \t]*$", re.MULTILINE)
+END_MARKER = "=== END ==="
+
+# Response formats (settings.llm_output_format). JSON asks the provider for a JSON
+# object where it can; text is the original TITLE:/CONTENT: layout
+ARTICLE_JSON_FORMAT = """Format: Return ONLY a JSON object of this shape:
+{"title": "<compelling headline>", "content": "<full article content, paragraphs separated by \\n\\n>"}"""
+TRANSLATION_JSON_FORMAT = """Format: Return ONLY a JSON object of this shape:
+{"title": "<translated title>", "content": "<translated content, paragraphs separated by \\n\\n>"}"""
+BATCH_JSON_FORMAT = """Format: Return ONLY a JSON object of this shape, with one entry per article, in order:
+{"articles": [{"number": <article number>, "title": "<compelling headline>", "content": "<full article content>"}]}"""
+ARTICLE_TEXT_FORMAT = """Format: Return ONLY in this format:
+TITLE: [compelling headline]
+
+CONTENT: [full article content with 3-4 paragraphs]"""
+TRANSLATION_TEXT_FORMAT = "Format: Return ONLY 'TITLE: [translated title]\\n\\nCONTENT: [translated content]'"
+BATCH_TEXT_FORMAT = f"""Format: Return ONLY the articles, in order, each exactly like this:
+=== ARTICLE [number] ===
+TITLE: [compelling headline]
+
+CONTENT: [full article content]
+{END_MARKER}"""
+
+class ParseError(ValueError):
+    """The model answered, but not in the requested format"""
+
+_json_decoder = json.JSONDecoder()
+# Models without a native JSON mode sometimes wrap the object in a Markdown fence
+_JSON_LEAD = re.compile(r"\s*(?:```(?:json)?\s*)?")
+_JSON_TRAIL = re.compile(r"\s*(?:```\s*)?\Z")
+
+def _decode_json_object(text: str) -> dict:
+    """The single JSON object in text, decoded in place; anything around it but a fence fails"""
+    start = _JSON_LEAD.match(text).end()
+    try:
+        value, end = _json_decoder.raw_decode(text, start)
+    except json.JSONDecodeError as e:
+        raise ParseError(f"Response is not JSON: {e.msg} at {e.pos}")
+    if not isinstance(value, dict):
+        raise ParseError("Response is not a JSON object")
+    if not _JSON_TRAIL.match(text, end):
+        raise ParseError(f"Unexpected text after the JSON object at {end}")
+    return value
+
+def _article_fields(value) -> dict:
+    title, content = (value.get("title"), value.get("content")) if isinstance(value, dict) else (None, None)
+    if not isinstance(title, str) or not isinstance(content, str) or not title.strip() or not content.strip():
+        raise ParseError("Article needs non-empty string title and content")
+    return {"title": title.strip(), "content": content.strip(), "category": None, "location": "Manteiv"}
+
+def parse_article_json(text: str) -> dict:
+    """Strictly parse a single-article JSON response"""
+    return _article_fields(_decode_json_object(text))
+
+def parse_batch_json(text: str, count: int) -> dict:
+    """{index: article} for every valid entry of a multi-article JSON response.
+    
+    Raises ParseError only when the response as a whole is unusable; invalid or
+    out-of-range entries are left out so just those get regenerated.
+    """
+    articles = _decode_json_object(text).get("articles")
+    if not isinstance(articles, list):
+        raise ParseError('Response has no "articles" list')
+    parsed = {}
+    for position, item in enumerate(articles):
+        number = item.get("number", position + 1) if isinstance(item, dict) else None
+        if not isinstance(number, int) or not 1 <= number <= count or number - 1 in parsed:
+            continue
+        try:
+            parsed[number - 1] = _article_fields(item)
+        except ParseError:
+            continue
+    return parsed
+
+def _split_evenly(total, parts: int):
+    """Split a token count across the articles of one call so the parts sum to the total"""
+    if total is None:
+        return [None] * parts
+    share, rest = divmod(total, parts)
+    return [share + (1 if i < rest else 0) for i in range(parts)]
+
+def model_max_output_tokens(model: str) -> int:
+    """Provider cap on completion tokens per call for model"""
+    prefixes = [prefix for prefix in MODEL_MAX_OUTPUT_TOKENS if model.startswith(prefix)]
+    return MODEL_MAX_OUTPUT_TOKENS[max(prefixes, key=len)] if prefixes else DEFAULT_MAX_OUTPUT_TOKENS
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of a call, 0 for models without a known price"""
+    prompt_price, completion_price = MODEL_PRICES_PER_1K.get(model, (0.0, 0.0))
+    return ((prompt_tokens or 0) * prompt_price + (completion_tokens or 0) * completion_price) / 1000
+
 class AINewsGenerator:
     def __init__(self):
         self.settings = settings
-        if self.settings.ai_provider == "gemini" and self.settings.gemini_api_key:
-            genai.configure(api_key=self.settings.gemini_api_key)
-            self.gemini_model = genai.GenerativeModel('gemini-pro')
-        elif self.settings.ai_provider == "openai" and self.settings.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.settings.openai_api_key)
+        # Provider SDKs are heavy to import, so clients are built on first use
+        self._gemini_model = None
+        self._openai_client = None
+        self._client_lock = threading.Lock()
     
-    def generate_news(self, topic: str = None, category: str = "general", include_billionaire: bool = False):
-        """Generate fake news article using AI with random features from database"""
-        
-        # Get random features from database
+    @property
+    def gemini_model(self):
+        """Gemini model, imported and configured on first use"""
+        if self._gemini_model is None:
+            if not self.settings.gemini_api_key:
+                raise RuntimeError("GEMINI_API_KEY is not configured")
+            with self._client_lock:
+                if self._gemini_model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.settings.gemini_api_key)
+                    self._gemini_model = genai.GenerativeModel(self.settings.gemini_model)
+        return self._gemini_model
+    
+    @property
+    def openai_client(self):
+        """OpenAI client, imported and constructed on first use"""
+        if self._openai_client is None:
+            if not self.settings.openai_api_key:
+                raise RuntimeError("OPENAI_API_KEY is not configured")
+            with self._client_lock:
+                if self._openai_client is None:
+                    from openai import OpenAI
+                    self._openai_client = OpenAI(api_key=self.settings.openai_api_key)
+        return self._openai_client
+    
+    @property
+    def model_name(self):
+        if self.settings.ai_provider == "openai":
+            return self.settings.openai_model
+        return self.settings.gemini_model
+    
+    @property
+    def json_mode(self):
+        return self.settings.llm_output_format == "json"
+    
+    def _gemini_json_supported(self):
+        """Gemini's JSON response mode needs google-generativeai>=0.5 and a 1.5+ model"""
+        import google.ai.generativelanguage as glm
+        model = self.settings.gemini_model.removeprefix("models/")
+        return (
+            "response_mime_type" in glm.GenerationConfig.meta.fields
+            and model != "gemini-pro" and not model.startswith("gemini-1.0")
+        )
+    
+    def _complete(self, prompt: str, max_tokens: int = None):
+        """Send one prompt to the configured provider; returns (text, token usage)"""
+        max_tokens = max_tokens or self.settings.llm_max_output_tokens
+        if self.settings.ai_provider == "gemini":
+            generation_config = {"max_output_tokens": max_tokens}
+            if self.json_mode and self._gemini_json_supported():
+                generation_config["response_mime_type"] = "application/json"
+            response = self.gemini_model.generate_content(prompt, generation_config=generation_config)
+            usage = getattr(response, "usage_metadata", None)
+            return response.text, {
+                "prompt_tokens": getattr(usage, "prompt_token_count", None),
+                "completion_tokens": getattr(usage, "candidates_token_count", None),
+            }
+        if self.settings.ai_provider == "openai":
+            extra = {"response_format": {"type": "json_object"}} if self.json_mode else {}
+            response = self.openai_client.chat.completions.create(
+                model=self.settings.openai_model,
+                max_tokens=max_tokens,
+                **extra,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            usage = response.usage
+            return response.choices[0].message.content, {
+                "prompt_tokens": usage.prompt_tokens if usage else None,
+                "completion_tokens": usage.completion_tokens if usage else None,
+            }
+        raise ValueError(f"Unknown AI provider: {self.settings.ai_provider}")
+    
+    def _pick_features(self):
+        """Random character/place/weather/event from the database; returns (prompt text, names)"""
         db = SessionLocal()
         try:
             character = crud.get_random_feature(db, models.Character)
@@ -60,14 +259,21 @@ class AINewsGenerator:
         if event:
             features_text += f"Event: {event.name}\n"
             features_dict["event"] = event.name
-        
+        return features_text, features_dict
+    
+    def generate_news(self, topic: str = None, category: str = "general", include_billionaire: bool = False):
+        """Generate fake news article using AI with random features from database"""
+        features_text, features_dict = self._pick_features()
+        return self._generate_one(topic, category, include_billionaire, features_text, features_dict)
+    
+    def _generate_one(self, topic, category, include_billionaire, features_text, features_dict):
         if include_billionaire:
             prompt = f"""Write a fake news article with these features:
 {features_text}
 The story should involve a famous billionaire from Manteiv (a fictional country). 
 Make it dramatic and entertaining but clearly fake.
 
-Format: Return ONLY 'TITLE: [title]\\n\\nCONTENT: [content]'"""
+{ARTICLE_JSON_FORMAT if self.json_mode else ARTICLE_TEXT_FORMAT}"""
         else:
             if not topic:
                 topic = f"something interesting in {category}"
@@ -80,34 +286,250 @@ Location: Manteiv (a fictional country)
 
 IMPORTANT: Incorporate ALL the features listed above into the story naturally.
 Make it believable but clearly fabricated. Include fictional details.
-The article should be entertaining and satirical.
-
-Format: Return ONLY in this format:
-TITLE: [compelling headline]
+The article should be entertaining and satirical, with 3-4 paragraphs.
 
-CONTENT: [full article content with 3-4 paragraphs]
+{ARTICLE_JSON_FORMAT if self.json_mode else ARTICLE_TEXT_FORMAT}
 """
         
-        try:
-            if self.settings.ai_provider == "gemini":
-                response = self.gemini_model.generate_content(prompt)
-                result = self._parse_response(response.text, category)
-            elif self.settings.ai_provider == "openai":
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a creative fake news generator. Generate entertaining but clearly fictional news articles."},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                result = self._parse_response(response.choices[0].message.content, category)
-            
-            # Add features to result
-            result["features_used"] = features_dict
-            return result
-        except Exception as e:
+        # Usage record for the generation_log table (see crud.create_generated_article)
+        generation = {
+            "provider": self.settings.ai_provider,
+            "model": self.model_name,
+            "category": category,
+            "prompt_chars": len(prompt),
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "fell_back": False,
+            "parse_failed": False,
+            "error": None,
+        }
+        # Unparsable answers are retried up to llm_parse_retries times; each wasted
+        # call is logged against the article as a parse_failed row
+        failed_attempts = []
+        for attempt in range(1 + max(0, self.settings.llm_parse_retries)):
+            generation.update(prompt_tokens=None, completion_tokens=None, parse_failed=False, error=None)
+            started = time.perf_counter()
+            try:
+                text, usage = self._complete(prompt)
+                generation.update(usage)
+                result = self._parse_article(text)
+                result["category"] = category
+            except ParseError as e:
+                generation.update(parse_failed=True, error=str(e)[:500])
+                result = None
+            except Exception as e:
+                generation["error"] = str(e)[:500]
+                result = None
+            generation["latency_ms"] = int((time.perf_counter() - started) * 1000)
+            if result is not None or not generation.get("parse_failed"):
+                break
+            if attempt < self.settings.llm_parse_retries:
+                failed_attempts.append(dict(generation))
+        if result is None:
             # Fallback to template if AI fails
-            return self._generate_fallback_news(category, include_billionaire, features_dict)
+            generation["fell_back"] = True
+            result = self._generate_fallback_news(category, include_billionaire, features_dict)
+        
+        # Add features and usage to result
+        result["features_used"] = features_dict
+        result["generation"] = generation
+        result["failed_generations"] = failed_attempts
+        return result
+    
+    def _batch_prompt(self, items: list) -> str:
+        """One prompt asking for every (spec, features text) item, sharing the instructions"""
+        sections = []
+        for number, (spec, features_text, _) in enumerate(items, 1):
+            lines = [f"ARTICLE {number}", f"Category: {spec['category']}"]
+            if spec.get("topic"):
+                lines.append(f"Topic: {spec['topic']}")
+            if spec.get("include_billionaire"):
+                lines.append("Billionaire: yes - the story must involve a famous billionaire from Manteiv")
+            sections.append("\n".join(lines) + "\n" + features_text)
+        return f"""Generate {len(items)} completely FAKE news articles set in Manteiv (a fictional country).
+Each article must incorporate ALL of its own features naturally and stay in its category.
+Make them believable but clearly fabricated, with fictional details.
+The articles should be entertaining and satirical, with 3-4 paragraphs each.
+
+{chr(10).join(sections)}
+{BATCH_JSON_FORMAT if self.json_mode else BATCH_TEXT_FORMAT}
+"""
+    
+    def _parse_article(self, text: str) -> dict:
+        if self.json_mode:
+            return parse_article_json(text)
+        return self._parse_response(text, category=None)
+    
+    def _parse_batch(self, text: str, count: int) -> dict:
+        """{index: parsed article} for every complete article in a multi-article response"""
+        if self.json_mode:
+            return parse_batch_json(text, count)
+        parsed = {}
+        markers = list(ARTICLE_MARKER.finditer(text))
+        for i, marker in enumerate(markers):
+            number = int(marker.group(1))
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+            body, found_end, _ = text[marker.end():end].partition(END_MARKER)
+            if not found_end or not 1 <= number <= count or number - 1 in parsed:
+                continue
+            try:
+                parsed[number - 1] = self._parse_response(body, category=None)
+            except ValueError:
+                continue
+        return parsed
+    
+    def max_batch_size(self) -> int:
+        """Articles per call that fit the model's output limit at llm_max_output_tokens each"""
+        return max(1, model_max_output_tokens(self.model_name) // max(1, self.settings.llm_max_output_tokens))
+    
+    def _batch_output_tokens(self, count: int) -> int:
+        return min(self.settings.llm_max_output_tokens * count, model_max_output_tokens(self.model_name))
+    
+    def generate_news_batch(self, specs: list, source: str = "scheduler"):
+        """Generate several articles with one LLM call; returns results in the order of specs.
+        
+        Each spec is a dict with "category", "include_billionaire" and optionally
+        "topic". Articles missing from a response (unparsable or cut off) are
+        asked for again in a smaller batch, up to generation_batch_retries more
+        calls, and whatever is still missing is generated one call at a time.
+        More specs than fit in the model's output limit are split across calls.
+        If the provider call itself fails, no further calls are made: the
+        remaining articles get the template fallback (generation["fell_back"]).
+        """
+        items = [(spec, *self._pick_features()) for spec in specs]
+        per_call = self.max_batch_size()
+        results, error = [], None
+        for start in range(0, len(items), per_call):
+            chunk = items[start:start + per_call]
+            if error is None:
+                chunk_results, error = self._generate_batch(chunk, source)
+            else:
+                chunk_results = [None] * len(chunk)
+            results += chunk_results
+        return [
+            result if result is not None else self._batch_fallback(item, error)
+            for item, result in zip(items, results)
+        ]
+    
+    def _generate_batch(self, items: list, source: str):
+        """One batch call plus parse retries; returns (results, provider error or None)"""
+        results = [None] * len(items)
+        pending = list(range(len(items)))
+        for _ in range(1 + max(0, self.settings.generation_batch_retries)):
+            if not pending:
+                break
+            batch = [items[i] for i in pending]
+            prompt = self._batch_prompt(batch)
+            call_id = uuid.uuid4().hex
+            started = time.perf_counter()
+            usage, parsed, error, parse_failed, provider_failed = {}, {}, None, False, False
+            try:
+                text, usage = self._complete(prompt, max_tokens=self._batch_output_tokens(len(batch)))
+                parsed = self._parse_batch(text, len(batch))
+                parse_failed = len(parsed) < len(batch)
+            except ParseError as e:
+                error, parse_failed = str(e)[:500], True
+            except Exception as e:
+                error, provider_failed = str(e)[:500], True
+            latency_ms = int((time.perf_counter() - started) * 1000)
+            generation = {
+                "provider": self.settings.ai_provider,
+                "model": self.model_name,
+                "latency_ms": latency_ms,
+                "fell_back": False,
+                "parse_failed": parse_failed,
+                "call_id": call_id,
+            }
+            if not parsed:
+                db = SessionLocal()
+                try:
+                    crud.log_generation(db, {
+                        **generation, "category": "batch", "prompt_chars": len(prompt),
+                        "prompt_tokens": usage.get("prompt_tokens"),
+                        "completion_tokens": usage.get("completion_tokens"),
+                        "error": error or "No complete article in the response",
+                    }, source=source)
+                finally:
+                    db.close()
+                if provider_failed:
+                    # Provider or transport error: retrying (as a batch or per article) won't help
+                    return results, error
+                continue
+            # The call's usage is split across the articles it produced
+            shares = list(zip(
+                _split_evenly(len(prompt), len(parsed)),
+                _split_evenly(usage.get("prompt_tokens"), len(parsed)),
+                _split_evenly(usage.get("completion_tokens"), len(parsed)),
+            ))
+            for (position, article), (chars, prompt_tokens, completion_tokens) in zip(sorted(parsed.items()), shares):
+                spec, _, features_dict = batch[position]
+                article["category"] = spec["category"]
+                article["features_used"] = features_dict
+                article["failed_generations"] = []
+                article["generation"] = {
+                    **generation, "category": spec["category"], "prompt_chars": chars,
+                    "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "error": None,
+                }
+                results[pending[position]] = article
+            pending = [index for index in pending if results[index] is None]
+        for index in pending:
+            spec, features_text, features_dict = items[index]
+            results[index] = self._generate_one(
+                spec.get("topic"), spec["category"], spec.get("include_billionaire", False),
+                features_text, features_dict
+            )
+        return results, None
+    
+    def _batch_fallback(self, item, error: str):
+        """Template article for an item whose batch call failed outright"""
+        spec, _, features_dict = item
+        result = self._generate_fallback_news(spec["category"], spec.get("include_billionaire", False), features_dict)
+        result["features_used"] = features_dict
+        result["failed_generations"] = []
+        result["generation"] = {
+            "provider": self.settings.ai_provider,
+            "model": self.model_name,
+            "category": spec["category"],
+            "prompt_chars": 0,
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "latency_ms": 0,
+            "fell_back": True,
+            "parse_failed": False,
+            "error": error,
+        }
+        return result
+    
+    def translate_article(self, title: str, content: str, locale: str):
+        """Translate an article's title and content; returns (translation, usage record).
+        
+        Unlike generate_news there is no template fallback: a failed translation
+        raises, and the article keeps being served in the source language.
+        """
+        language = LOCALE_NAMES.get(locale, locale)
+        prompt = f"""Translate this fake news article into {language}.
+Keep names of people, places and the country Manteiv unchanged.
+Keep the paragraph breaks.
+
+TITLE: {title}
+
+CONTENT: {content}
+
+{TRANSLATION_JSON_FORMAT if self.json_mode else TRANSLATION_TEXT_FORMAT}"""
+        
+        generation = {
+            "provider": self.settings.ai_provider,
+            "model": self.model_name,
+            "category": f"translation:{locale}",
+            "prompt_chars": len(prompt),
+            "fell_back": False,
+        }
+        started = time.perf_counter()
+        text, usage = self._complete(prompt)
+        generation.update(usage)
+        generation["latency_ms"] = int((time.perf_counter() - started) * 1000)
+        parsed = self._parse_article(text)
+        return {"title": parsed["title"], "content": parsed["content"]}, generation
     
     def _parse_response(self, text: str, category: str):
         """Parse AI response into title and content"""
@@ -129,7 +551,7 @@ CONTENT: [full article content with 3-4 paragraphs]
                 title = parts[0].strip()
                 content = parts[1].strip()
             else:
-                raise ValueError("Could not parse AI response")
+                raise ParseError("Could not parse AI response")
         
         return {
             "title": title,
@@ -0,0 +1,113 @@
+"""
+In-process fan-out of article events to SSE and WebSocket subscribers.
+
+crud write paths call publish() from any thread; delivery happens on the
+event loop. Each subscriber has a small bounded buffer: a client that falls
+behind loses its oldest events and is sent a "resync" event instead, telling
+it to refetch rather than replay. An idle subscriber costs one deque and one
+asyncio.Event.
+
+Event ids start from the process start time in milliseconds, so they keep
+increasing across restarts; a Last-Event-ID that the history can't replay
+from (from before a restart, or unknown) gets a "resync" too.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class Subscriber:
+    __slots__ = ("buffer", "ready", "lagged")
+    
+    def __init__(self, buffer_size: int):
+        self.buffer = deque(maxlen=buffer_size)
+        self.ready = asyncio.Event()
+        self.lagged = False
+    
+    def push(self, event: dict):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.lagged = True
+        self.buffer.append(event)
+        self.ready.set()
+    
+    async def next_events(self, timeout: float):
+        """Wait up to timeout for events; returns a possibly empty list"""
+        if not self.buffer:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self.buffer)
+        self.buffer.clear()
+        if self.lagged:
+            self.lagged = False
+            events = [{"type": "resync"}] + events[-1:]
+        return events
+
+class BroadcastHub:
+    def __init__(self, buffer_size: int = 16, history_size: int = 100):
+        self.buffer_size = buffer_size
+        self.subscribers = set()
+        self.history = deque(maxlen=history_size)  # for Last-Event-ID replay
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+    
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach to the server's event loop (call from startup)"""
+        self._loop = loop
+    
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscriber:
+        subscriber = Subscriber(self.buffer_size)
+        if last_event_id is not None:
+            missed = [event for event in self.history if event["event_id"] > last_event_id]
+            # Replay only works from an id this process handed out and still remembers
+            if (not self.history or self.history[0]["event_id"] > last_event_id + 1
+                    or last_event_id > self.history[-1]["event_id"]):
+                subscriber.push({"type": "resync"})
+            for event in missed[-self.buffer_size:]:
+                subscriber.push(event)
+        self.subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+    
+    def publish(self, event_type: str, data: dict):
+        """Thread-safe: queue an event for every subscriber"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._fan_out, event_type, data)
+    
+    def _fan_out(self, event_type: str, data: dict):
+        event = {"event_id": next(self._ids), "type": event_type, "data": data}
+        self.history.append(event)
+        self.published += 1
+        for subscriber in self.subscribers:
+            subscriber.push(event)
+    
+    def article_changed(self, action: str, info: dict):
+        """crud article listener"""
+        self.publish(f"article.{action}", info)
+    
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "lagging": sum(1 for s in self.subscribers if s.lagged),
+        }
+
+def format_sse(event: dict) -> str:
+    """One server-sent event; resync events carry no id so they are not resumed from"""
+    data = json.dumps(event, separators=(",", ":"))
+    if "event_id" in event:
+        return f"id: {event['event_id']}\nevent: {event['type']}\ndata: {data}\n\n"
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+hub = BroadcastHub()
@@ -0,0 +1,184 @@
+"""
+Query-plan regression check for crud.py.
+
+Runs every query issued by the crud functions against a seeded database,
+EXPLAINs each statement and fails if a hot query falls back to a sequential
+scan or an explicit sort. On PostgreSQL, seqscans and sorts are disabled for
+the EXPLAIN so the result doesn't depend on how large the tables are: if the
+planner still picks one, no index can serve the query.
+
+Point DATABASE_URL at a scratch database before running. tests/test_query_plans.py
+runs every case under pytest against a seeded database.
+
+Usage:
+    python check_query_plans.py [--seed 5000]
+"""
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, text
+
+import crud
+import generation_slots
+import models
+import synthetic_data
+from ai_service import CATEGORIES
+from database import SessionLocal, engine, init_db
+
+FEATURE_MODELS = [models.Character, models.Place, models.Weather, models.Event]
+
+# Queries that must touch every row, and why
+EXEMPT = {
+    "get_about_content": "single-row table",
+    "get_site_counters": "reads the whole (tiny) counters table",
+    "update_about_content": "single-row table",
+    "get_random_feature": "ORDER BY random() reads every row",
+    "get_generation_quota": "groups the handful of slots of one day",
+    # Trigram matches come back in index order, not name order
+    "get_features_page[contains]": "substring matches are sorted after the trigram lookup",
+}
+
+def exemption(case_name: str):
+    """Reason a case may scan, looked up by function name or function[variant]"""
+    base, _, variants = case_name.partition("[")
+    keys = [base] + [f"{base}[{v}]" for v in variants.rstrip("]").split(",") if v]
+    return next((EXEMPT[k] for k in keys if k in EXEMPT), None)
+
+def seed(db, count: int):
+    """Insert synthetic articles and features so the planner sees realistic data"""
+    now = datetime.now(timezone.utc)
+    synthetic_data.load(db, articles=count, features=max(count // 10, 1), seed=42, end=now.date(), days=365)
+    # A year of spread-schedule plans, mostly done
+    for offset in range(365):
+        rows = generation_slots.plan_day((now - timedelta(days=offset)).date())
+        for row in rows:
+            row["status"] = "done" if offset else "pending"
+        crud.create_generation_slots(db, rows)
+
+def query_cases():
+    """(name, callable) for every read path in crud.py"""
+    cases = [
+        ("get_news_articles", lambda db: crud.get_news_articles(db)),
+        ("get_news_articles[category]", lambda db: crud.get_news_articles(db, category=CATEGORIES[0])),
+        ("get_news_article", lambda db: crud.get_news_article(db, 1)),
+        ("get_news_articles_by_ids", lambda db: crud.get_news_articles_by_ids(db, [1, 2, 3])),
+        ("get_featured_news", lambda db: crud.get_featured_news(db)),
+        ("delete_news_article[missing]", lambda db: crud.delete_news_article(db, -1)),
+        ("get_article_count", lambda db: crud.get_article_count(db)),
+        ("get_max_article_id", lambda db: crud.get_max_article_id(db)),
+        ("iter_sitemap_entries", lambda db: crud.iter_sitemap_entries(db, 0, 50000).all()),
+        ("get_site_counters", lambda db: crud.get_site_counters(db)),
+        ("get_about_content", lambda db: crud.get_about_content(db)),
+        ("get_article_translations", lambda db: crud.get_article_translations(db, [1, 2, 3], "vi")),
+        ("get_untranslated_articles", lambda db: crud.get_untranslated_articles(db, "vi")),
+        ("get_untranslated_articles[since]", lambda db: crud.get_untranslated_articles(
+            db, "vi", since=datetime.now(timezone.utc) - timedelta(hours=24))),
+        ("claim_due_generation_slots", lambda db: crud.claim_due_generation_slots(
+            db, datetime.now(timezone.utc), datetime.now(timezone.utc).date() - timedelta(days=1), limit=2)),
+        ("release_stale_generation_slots", lambda db: crud.release_stale_generation_slots(
+            db, datetime.now(timezone.utc) - timedelta(minutes=15))),
+        ("get_generation_quota", lambda db: crud.get_generation_quota(db, datetime.now(timezone.utc).date())),
+        ("get_image", lambda db: crud.get_image(db, 1)),
+        ("get_image_by_hash", lambda db: crud.get_image_by_hash(db, "0" * 64)),
+        ("get_articles_missing_images", lambda db: crud.get_articles_missing_images(db)),
+    ]
+    for model in FEATURE_MODELS:
+        name = model.__tablename__
+        cases += [
+            (f"get_features_page[{name}]", lambda db, m=model: crud.get_features_page(db, m)),
+            (f"get_features_page[{name},cursor]", lambda db, m=model: crud.get_features_page(
+                db, m, cursor=crud.encode_cursor([50]))),
+            (f"get_features_page[{name},prefix]", lambda db, m=model: crud.get_features_page(
+                db, m, q="Old", cursor=crud.encode_cursor(["old", 1]))),
+            (f"get_features_page[{name},contains]", lambda db, m=model: crud.get_features_page(
+                db, m, q="side", match="contains")),
+            (f"get_feature[{name}]", lambda db, m=model: crud.get_feature(db, m, 1)),
+            (f"get_random_feature[{name}]", lambda db, m=model: crud.get_random_feature(db, m)),
+        ]
+    return cases
+
+def capture_statements(db, fn):
+    """Run fn and return the (statement, parameters) it sent to the database"""
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return [(s, p) for s, p in captured if s.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))]
+
+def explain(conn, statement, parameters):
+    """Return (plan lines, problems) for one statement"""
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        conn.exec_driver_sql("SET LOCAL enable_sort = off")
+        lines = [row[0] for row in conn.exec_driver_sql("EXPLAIN " + statement, parameters)]
+        # Sort nodes only; a Merge Append over partition indexes also prints a "Sort Key"
+        problems = [line.strip() for line in lines
+                    if re.search(r"Seq Scan|^\s*(->\s+)?(Incremental )?Sort\s+\(", line)]
+    else:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        lines = [row[-1] for row in rows]
+        # SQLite reports walking the rowid btree in primary-key order as a plain SCAN
+        pk_ordered = re.search(r"ORDER BY \w+\.id( DESC)?\s+LIMIT", statement) is not None
+        problems = [line for line in lines
+                    if (line.startswith("SCAN ") and " USING " not in line and not pk_ordered)
+                    or "TEMP B-TREE" in line]
+    return lines, problems
+
+def analyze():
+    """Refresh planner statistics after seeding"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+
+def check_case(db, name: str, fn, verbose: bool = False):
+    """EXPLAIN every statement one case issues; returns the problem plan lines that aren't exempt"""
+    failed = []
+    for statement, parameters in capture_statements(db, fn):
+        with engine.connect() as conn:
+            lines, problems = explain(conn, statement, parameters)
+            conn.rollback()
+        exempt = exemption(name)
+        status = "ok" if not problems else ("exempt" if exempt else "FAIL")
+        print(f"[{status:6}] {name}: {' '.join(statement.split())[:100]}")
+        if verbose or status == "FAIL":
+            for line in lines:
+                print(f"           {line}")
+        if status == "FAIL":
+            failed.extend(problems)
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every crud.py query and flag scans/sorts")
+    parser.add_argument("--seed", type=int, default=0, help="insert N synthetic articles first")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    failures = []
+    try:
+        if args.seed:
+            seed(db, args.seed)
+        analyze()
+
+        for name, fn in query_cases():
+            if check_case(db, name, fn, args.verbose):
+                failures.append(name)
+    finally:
+        db.close()
+
+    if failures:
+        print(f"❌ {len(failures)} query plan(s) fall back to a scan or sort: {', '.join(failures)}")
+        sys.exit(1)
+    print("✅ All hot queries are index-backed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure backend import time and time-to-ready against a budget.
+
+Exits non-zero if either budget is exceeded or if importing the app pulls in
+an LLM provider SDK (those must stay lazily imported). tests/test_startup.py
+runs the same checks under pytest.
+
+Usage:
+    python check_startup.py [--import-budget 2.0] [--ready-budget 5.0] [--port 8765]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_BUDGET_SECONDS = 2.0
+READY_BUDGET_SECONDS = 5.0
+
+# Modules that must not be loaded just by importing the app
+LAZY_MODULES = ["google.generativeai", "openai", "PIL"]
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+eager = [m for m in {lazy!r} if m in sys.modules]
+print(elapsed)
+print(",".join(eager))
+"""
+
+def measure_import_time():
+    """Import main in a fresh interpreter and return (seconds, eagerly loaded SDKs)"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE.format(lazy=LAZY_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    lines = result.stdout.strip().splitlines()
+    eager = [m for m in lines[-1].split(",") if m] if len(lines) > 1 else []
+    return float(lines[0]), eager
+
+def measure_time_to_ready(port: int, timeout: float):
+    """Start uvicorn and return seconds until /api/health answers 200"""
+    env = dict(os.environ, SEED_ON_STARTUP="false")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/api/health"
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited before becoming ready")
+            try:
+                if httpx.get(url, timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check backend startup budgets")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS, help="max seconds to import main")
+    parser.add_argument("--ready-budget", type=float, default=READY_BUDGET_SECONDS, help="max seconds until /api/health is up")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    failures = []
+
+    import_time, eager = measure_import_time()
+    print(f"import main: {import_time:.3f}s (budget {args.import_budget:.3f}s)")
+    if import_time > args.import_budget:
+        failures.append("import time over budget")
+    if eager:
+        failures.append(f"provider SDKs imported eagerly: {', '.join(eager)}")
+
+    ready_time = measure_time_to_ready(args.port, timeout=args.ready_budget * 2)
+    if ready_time is None:
+        print(f"time to ready: timed out (budget {args.ready_budget:.3f}s)")
+        failures.append("app never became ready")
+    else:
+        print(f"time to ready: {ready_time:.3f}s (budget {args.ready_budget:.3f}s)")
+        if ready_time > args.ready_budget:
+            failures.append("time to ready over budget")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+if __name__ == "__main__":
+    main()
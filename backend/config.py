@@ -3,12 +3,98 @@ from functools import lru_cache
 
 class Settings(BaseSettings):
     database_url: str
+    database_replica_urls: str = ""  # comma-separated read replica URLs
+    replica_sticky_seconds: int = 5  # keep a client on the primary this long after a write
+    replica_max_lag_seconds: float = 10.0  # replicas lagging more than this are skipped
+    replica_lag_check_interval: float = 5.0  # seconds between replica lag checks
+    replica_connect_timeout: int = 2  # seconds to connect to a replica (libpq minimum is 2)
+    replica_probe_timeout_ms: int = 1000  # statement timeout of the replica lag query
     gemini_api_key: str = ""
     openai_api_key: str = ""
     ai_provider: str = "gemini"  # "gemini" or "openai"
+    gemini_model: str = "gemini-pro"
+    openai_model: str = "gpt-3.5-turbo"
+    llm_max_output_tokens: int = 1024  # cap on completion tokens per call (per article in batch calls)
+    generation_schedule: str = "burst"  # "burst" (every article at 06:00) or "spread" (see generation_slots.py)
+    generation_quotas: str = ""  # daily articles per category when spread, e.g. "Politics=2,Sports=1" (1 each if empty)
+    generation_window: str = "6-23"  # local hours the spread slots fall in
+    generation_slot_jitter: float = 0.3  # random shift of each slot, as a fraction of the slot spacing
+    generation_catchup_per_tick: int = 2  # overdue slots generated per minute after downtime
+    generation_catchup_days: int = 1  # earlier days whose missed slots are still caught up
+    generation_backoff_max_seconds: int = 3600  # longest pause while the provider keeps failing
+    llm_output_format: str = "json"  # "json" (provider JSON mode where available) or "text" (TITLE:/CONTENT:)
+    llm_parse_retries: int = 1  # extra calls when an answer can't be parsed (provider errors aren't retried)
+    generation_batch_size: int = 4  # articles per LLM call in the daily job (1 = one call per article)
+    generation_batch_retries: int = 1  # extra batch calls for articles missing from a response
     jwt_secret_key: str = "change-this-secret-key-in-production"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 10080  # 7 days
+    auto_create_schema: bool = True  # run migrations on startup
+    seed_on_startup: bool = True  # generate initial news in the background if empty
+    feature_bulk_chunk_size: int = 500  # rows per INSERT ... ON CONFLICT statement
+    snapshot_dir: str = ""  # publish static JSON snapshots here for nginx (disabled if empty)
+    site_url: str = "http://localhost"  # public origin used for links in feeds and sitemaps
+    feed_dir: str = ""  # pre-built RSS/Atom feeds and sitemaps (under the system temp dir if empty)
+    profiling_enabled: bool = False  # install the profiling middleware at all
+    profiling_sample_rate: float = 0.0  # fraction of requests profiled without the header
+    profiling_interval_ms: float = 5.0  # stack sampling interval
+    profiling_n_plus_one_threshold: int = 5  # same statement this often in one request is flagged
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" (single worker) or "database" (shared)
+    rate_limit_generate_burst: int = 5  # per user
+    rate_limit_generate_per_minute: float = 2.0
+    rate_limit_login_burst: int = 10  # per IP
+    rate_limit_login_per_minute: float = 5.0
+    rate_limit_max_buckets: int = 10000  # in-memory buckets kept; the least recently used are dropped
+    trusted_proxies: str = ""  # comma-separated IPs/CIDRs whose X-Real-IP/X-Forwarded-For is believed
+    idempotency_ttl_hours: int = 24  # stored responses are replayable this long
+    idempotency_wait_seconds: float = 90.0  # a retry waits this long for the original to finish
+    idempotency_lock_seconds: float = 300.0  # an original that hasn't sent a heartbeat for this long is taken over
+    source_locale: str = "en"  # language the LLM writes articles in
+    translation_locales: str = ""  # comma-separated locales to translate articles into, e.g. "vi" ("" disables)
+    translation_max_age_hours: int = 24  # the background job only translates articles published this recently; older ones need `python translations.py`
+    translation_batch_size: int = 10  # untranslated articles picked up per locale per run
+    translation_concurrency: int = 2  # parallel LLM calls while translating
+    translation_interval_seconds: int = 60  # catch-up run for anything the immediate run missed
+    media_dir: str = ""  # content-addressed images and their variants, served by nginx (disabled if empty)
+    media_url_prefix: str = "/media"  # URL nginx serves media_dir under
+    image_variant_widths: str = "320,640,1280"  # resized variants, each as WebP and JPEG
+    image_max_bytes: int = 10485760  # 10 MB per upload or download
+    image_workers: int = 2  # processes decoding and resizing images
+    image_fetch_timeout: float = 10.0  # seconds to download an article's image_url
+    partition_months_ahead: int = 2  # monthly news_articles partitions created in advance (partitions.py)
+    archive_after_months: int = 12  # partitions older than this move to the archive tier
+    archive_tablespace: str = ""  # tablespace for archived partitions (frozen in place if empty)
+    
+    @property
+    def replica_urls(self):
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+    
+    @property
+    def trusted_proxy_list(self):
+        return [proxy.strip() for proxy in self.trusted_proxies.split(",") if proxy.strip()]
+    
+    @property
+    def generation_quota_map(self):
+        quotas = {}
+        for item in self.generation_quotas.split(","):
+            category, _, count = item.partition("=")
+            if category.strip():
+                quotas[category.strip()] = int(count or 1)
+        return quotas
+    
+    @property
+    def generation_window_hours(self):
+        start, _, end = self.generation_window.partition("-")
+        return int(start), int(end or 24)
+    
+    @property
+    def translation_locale_list(self):
+        return [locale.strip().lower() for locale in self.translation_locales.split(",") if locale.strip()]
+    
+    @property
+    def image_variant_width_list(self):
+        return sorted({int(width) for width in self.image_variant_widths.split(",") if width.strip()})
     
     class Config:
         env_file = ".env"
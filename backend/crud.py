@@ -1,43 +1,418 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import String, case, cast, desc, distinct, func, literal, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta, timezone
+import base64
+import json
+import logging
+import threading
 import models
 import schemas
 
+logger = logging.getLogger(__name__)
+
+# Callbacks run after an article change is committed: listener(action, info)
+# with action "created", "updated" or "deleted" and info {"id", "category", "is_featured"}
+article_listeners = []
+
+def _article_info(article):
+    return {"id": article.id, "category": article.category, "is_featured": bool(article.is_featured)}
+
+def add_article_listener(listener):
+    """Register listener; adding one that is already registered is a no-op"""
+    if listener not in article_listeners:
+        article_listeners.append(listener)
+
+def remove_article_listener(listener):
+    if listener in article_listeners:
+        article_listeners.remove(listener)
+
+def _notify_article_listeners(action: str, info: dict):
+    for listener in article_listeners:
+        try:
+            listener(action, info)
+        except Exception as e:
+            logger.error(f"Article listener {listener!r} failed: {str(e)}")
+
+# Site counters (site_counters table), kept in the same transaction as the article writes
+ARTICLES_COUNTER = "articles"
+FEATURED_COUNTER = "articles:featured"
+VIEWS_COUNTER = "views"
+CATEGORY_COUNTER_PREFIX = "articles:category:"
+
+# Views are hot, so they are summed in memory and flushed periodically (see flush_view_counter)
+_pending_views = 0
+_pending_views_lock = threading.Lock()
+
+def _article_counter_deltas(article, sign: int):
+    deltas = {ARTICLES_COUNTER: sign, CATEGORY_COUNTER_PREFIX + article.category: sign}
+    if article.is_featured:
+        deltas[FEATURED_COUNTER] = sign
+    if article.views:
+        deltas[VIEWS_COUNTER] = sign * article.views
+    return deltas
+
+def _bump_counters(db: Session, deltas: dict):
+    """Add deltas to site_counters inside the caller's transaction"""
+    rows = [{"name": name, "value": value} for name, value in sorted(deltas.items()) if value]
+    if not rows:
+        return
+    insert = upsert_insert(db)
+    stmt = insert(models.SiteCounter).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.SiteCounter.name],
+        set_={"value": models.SiteCounter.value + stmt.excluded.value}
+    )
+    db.execute(stmt)
+
+def _record_views(count: int):
+    global _pending_views
+    with _pending_views_lock:
+        _pending_views += count
+
+def flush_view_counter(db: Session):
+    """Write views recorded since the last flush to the views counter"""
+    global _pending_views
+    with _pending_views_lock:
+        count, _pending_views = _pending_views, 0
+    if count:
+        try:
+            _bump_counters(db, {VIEWS_COUNTER: count})
+            db.commit()
+        except Exception:
+            db.rollback()
+            _record_views(count)
+            raise
+    return count
+
+def get_site_counters(db: Session):
+    """All counters as {name: value} - a handful of rows regardless of article count"""
+    return {name: value for name, value in db.query(models.SiteCounter.name, models.SiteCounter.value)}
+
+def rebuild_counters(db: Session):
+    """Recompute every counter from news_articles (repair after drift or bulk loads)"""
+    global _pending_views
+    if db.get_bind().dialect.name == "postgresql":
+        # Block article writes so no delta lands between the recount and the commit
+        db.execute(text("LOCK TABLE news_articles IN SHARE MODE"))
+    article = models.NewsArticle
+    counters = {
+        ARTICLES_COUNTER: db.query(func.count(article.id)).scalar(),
+        FEATURED_COUNTER: db.query(func.count(article.id)).filter(article.is_featured == True).scalar(),
+        VIEWS_COUNTER: db.query(func.coalesce(func.sum(article.views), 0)).scalar(),
+    }
+    for category, count in db.query(article.category, func.count(article.id)).group_by(article.category):
+        counters[CATEGORY_COUNTER_PREFIX + category] = count
+    db.query(models.SiteCounter).delete(synchronize_session=False)
+    db.add_all(models.SiteCounter(name=name, value=value) for name, value in counters.items())
+    with _pending_views_lock:
+        _pending_views = 0
+    db.commit()
+    return counters
+
+def encode_cursor(values: list) -> str:
+    """Opaque pagination cursor from the sort key of the last row"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str, types: tuple) -> list:
+    """Inverse of encode_cursor; raises ValueError unless the values match types"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    # bool is an int to isinstance, but never a valid cursor value
+    if any(isinstance(v, bool) or not isinstance(v, t) for v, t in zip(values, types)):
+        raise ValueError("Invalid cursor")
+    return values
+
+# Recent-first pages are tried within this window first, which lets Postgres
+# prune news_articles down to the newest monthly partitions (see partitions.py)
+RECENT_WINDOW = timedelta(days=62)
+
+def _recent_first(query, skip: int, limit: int):
+    """Newest-first page of query, looking at recent rows before the whole table"""
+    ordered = query.order_by(desc(models.NewsArticle.published_date))
+    since = datetime.now(timezone.utc) - RECENT_WINDOW
+    rows = ordered.filter(models.NewsArticle.published_date >= since).offset(skip).limit(limit).all()
+    if len(rows) < limit:
+        # Page reaches past the window: the recent rows were a prefix of the full order
+        rows = ordered.offset(skip).limit(limit).all()
+    return rows
+
 def get_news_articles(db: Session, skip: int = 0, limit: int = 20, category: str = None):
     query = db.query(models.NewsArticle)
     if category:
         query = query.filter(models.NewsArticle.category == category)
-    return query.order_by(desc(models.NewsArticle.published_date)).offset(skip).limit(limit).all()
+    return _recent_first(query, skip, limit)
+
+def get_max_article_id(db: Session):
+    return db.query(func.max(models.NewsArticle.id)).scalar() or 0
+
+def iter_sitemap_entries(db: Session, first_id: int, end_id: int, batch_size: int = 5000):
+    """(id, published_date) for first_id <= id < end_id in id order, fetched batch_size rows at a time"""
+    return db.query(models.NewsArticle.id, models.NewsArticle.published_date).filter(
+        models.NewsArticle.id >= first_id, models.NewsArticle.id < end_id
+    ).order_by(models.NewsArticle.id).yield_per(batch_size)
 
 def get_news_article(db: Session, article_id: int):
     article = db.query(models.NewsArticle).filter(models.NewsArticle.id == article_id).first()
     if article:
         article.views += 1
         db.commit()
+        _record_views(1)
     return article
 
+def get_news_articles_by_ids(db: Session, article_ids: list, record_views: bool = True):
+    """Load many articles with one IN query; returns {id: article} for the ids that exist"""
+    if not article_ids:
+        return {}
+    if record_views:
+        # One UPDATE for all views, committed before loading so the rows come back fresh
+        updated = db.query(models.NewsArticle).filter(
+            models.NewsArticle.id.in_(article_ids)
+        ).update({models.NewsArticle.views: models.NewsArticle.views + 1}, synchronize_session=False)
+        db.commit()
+        _record_views(updated)
+    articles = db.query(models.NewsArticle).filter(models.NewsArticle.id.in_(article_ids)).all()
+    return {article.id: article for article in articles}
+
 def get_featured_news(db: Session, limit: int = 5):
-    return db.query(models.NewsArticle).filter(
-        models.NewsArticle.is_featured == True
-    ).order_by(desc(models.NewsArticle.published_date)).limit(limit).all()
+    return _recent_first(db.query(models.NewsArticle).filter(models.NewsArticle.is_featured == True), 0, limit)
 
 def create_news_article(db: Session, article: schemas.NewsArticleCreate):
     db_article = models.NewsArticle(**article.dict())
     db.add(db_article)
+    _bump_counters(db, _article_counter_deltas(db_article, +1))
+    db.commit()
+    db.refresh(db_article)
+    _notify_article_listeners("created", _article_info(db_article))
+    return db_article
+
+def create_generated_article(db: Session, news_data: dict, source: str, slot_id: int = None):
+    """Store an AI-generated article and its generation_log row in one transaction.
+    
+    With slot_id, the generation slot it fills is marked done in the same transaction.
+    """
+    db_article = models.NewsArticle(**schemas.NewsArticleCreate(**news_data).dict())
+    db.add(db_article)
+    _bump_counters(db, _article_counter_deltas(db_article, +1))
+    generation = news_data.get("generation")
+    if generation or slot_id is not None:
+        db.flush()
+    if slot_id is not None:
+        db.query(models.GenerationSlot).filter(models.GenerationSlot.id == slot_id).update({
+            models.GenerationSlot.status: "done",
+            models.GenerationSlot.article_id: db_article.id,
+            models.GenerationSlot.completed_at: func.now(),
+        }, synchronize_session=False)
+    if generation:
+        # Calls whose answer could not be parsed before this one, then the call that produced it
+        for failed in news_data.get("failed_generations") or []:
+            db.add(models.GenerationLog(source=source, article_id=db_article.id, **failed))
+        db.add(models.GenerationLog(source=source, article_id=db_article.id, **generation))
     db.commit()
     db.refresh(db_article)
+    _notify_article_listeners("created", _article_info(db_article))
     return db_article
 
+def log_generation(db: Session, generation: dict, source: str):
+    """generation_log row for a call that produced no article"""
+    db.add(models.GenerationLog(source=source, **generation))
+    db.commit()
+
+def get_article_translations(db: Session, article_ids: list, locale: str):
+    """Stored translations of the given articles into one locale; returns {article_id: translation}"""
+    if not article_ids:
+        return {}
+    rows = db.query(models.ArticleTranslation).filter(
+        models.ArticleTranslation.locale == locale,
+        models.ArticleTranslation.article_id.in_(article_ids)
+    ).all()
+    return {row.article_id: row for row in rows}
+
+def get_untranslated_articles(db: Session, locale: str, limit: int = 10, exclude_ids: list = None, since=None):
+    """Newest articles (published since `since`, if given) that have no translation into locale yet"""
+    translated = db.query(models.ArticleTranslation.id).filter(
+        models.ArticleTranslation.article_id == models.NewsArticle.id,
+        models.ArticleTranslation.locale == locale
+    ).exists()
+    query = db.query(models.NewsArticle).filter(~translated)
+    if exclude_ids:
+        query = query.filter(models.NewsArticle.id.notin_(exclude_ids))
+    if since is not None:
+        # Bounded by the published_date index instead of walking back through the archive
+        query = query.filter(models.NewsArticle.published_date >= since)
+        return query.order_by(desc(models.NewsArticle.published_date)).limit(limit).all()
+    return query.order_by(desc(models.NewsArticle.id)).limit(limit).all()
+
+def create_article_translation(db: Session, article_id: int, locale: str, translation: dict, generation: dict = None):
+    """Store a translation and its generation_log row; a concurrent duplicate is ignored"""
+    insert = upsert_insert(db)
+    stmt = insert(models.ArticleTranslation).values(
+        article_id=article_id, locale=locale,
+        title=translation["title"][:500], content=translation["content"]
+    ).on_conflict_do_nothing(index_elements=["article_id", "locale"])
+    created = db.execute(stmt).rowcount > 0
+    if created and generation:
+        db.add(models.GenerationLog(source="translation", article_id=article_id, **generation))
+    db.commit()
+    return created
+
+def get_image(db: Session, image_id: int):
+    return db.query(models.Image).filter(models.Image.id == image_id).first()
+
+def get_image_by_hash(db: Session, sha256: str):
+    return db.query(models.Image).filter(models.Image.sha256 == sha256).first()
+
+def create_image(db: Session, metadata: dict, source_url: str = None):
+    """Store an ingested image and its variants; returns the existing row if the hash raced in"""
+    variants = [models.ImageVariant(**variant) for variant in metadata["variants"]]
+    fields = {key: value for key, value in metadata.items() if key != "variants"}
+    image = models.Image(source_url=source_url, variants=variants, **fields)
+    db.add(image)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker stored the same content first: use its row
+        db.rollback()
+        existing = get_image_by_hash(db, metadata["sha256"])
+        if existing is None:
+            raise
+        return existing
+    db.refresh(image)
+    return image
+
+def get_articles_missing_images(db: Session, limit: int = 10, exclude_ids: list = None):
+    """Newest articles with an external image_url that has not been ingested yet"""
+    query = db.query(models.NewsArticle).filter(
+        models.NewsArticle.image_url.isnot(None),
+        models.NewsArticle.image_id.is_(None)
+    )
+    if exclude_ids:
+        query = query.filter(models.NewsArticle.id.notin_(exclude_ids))
+    return query.order_by(desc(models.NewsArticle.id)).limit(limit).all()
+
+def set_article_image(db: Session, article_id: int, image_id: int):
+    article = db.query(models.NewsArticle).filter(models.NewsArticle.id == article_id).first()
+    if article:
+        article.image_id = image_id
+        db.commit()
+        _notify_article_listeners("updated", _article_info(article))
+    return article
+
+def get_generation_usage(db: Session, since):
+    """Generation calls, tokens and latency per day, category and model since a datetime"""
+    day = func.date(models.GenerationLog.created_at)
+    log = models.GenerationLog
+    call = func.coalesce(log.call_id, cast(log.id, String))
+    return db.query(
+        day.label("day"),
+        log.category,
+        log.provider,
+        log.model,
+        # Rows of one multi-article call share a call_id and count as one call
+        func.count(distinct(call)).label("calls"),
+        func.sum(case((log.fell_back == True, 1), else_=0)).label("fallbacks"),
+        func.count(distinct(case((log.parse_failed == True, call)))).label("parse_failures"),
+        func.coalesce(func.sum(log.prompt_tokens), 0).label("prompt_tokens"),
+        func.coalesce(func.sum(log.completion_tokens), 0).label("completion_tokens"),
+        func.avg(log.latency_ms).label("avg_latency_ms"),
+    ).filter(log.created_at >= since).group_by(
+        day, log.category, log.provider, log.model
+    ).order_by(day.desc(), log.category).all()
+
+def get_generation_totals(db: Session, since):
+    """Provider calls, calls with unparsable answers and generated articles since a datetime.
+    
+    A multi-article call spans several usage rows but counts once.
+    """
+    log = models.GenerationLog
+    call = func.coalesce(log.call_id, cast(log.id, String))
+    row = db.query(
+        func.count(distinct(call)).label("calls"),
+        func.count(distinct(case((log.parse_failed == True, call)))).label("parse_failures"),
+        func.count(distinct(case((log.source != "translation", log.article_id)))).label("articles"),
+    ).filter(log.created_at >= since).one()
+    return {"calls": row.calls, "parse_failures": row.parse_failures, "articles": row.articles}
+
+def create_generation_slots(db: Session, rows: list):
+    """Insert a day's planned slots; slots that already exist are left alone"""
+    if rows:
+        insert = upsert_insert(db)
+        db.execute(insert(models.GenerationSlot).values(rows).on_conflict_do_nothing(index_elements=["day", "slot"]))
+    db.commit()
+
+def release_stale_generation_slots(db: Session, claimed_before):
+    """Put back slots whose worker died while generating"""
+    slot = models.GenerationSlot
+    released = db.query(slot).filter(slot.status == "running", slot.claimed_at < claimed_before).update(
+        {slot.status: "pending", slot.claimed_at: None}, synchronize_session=False
+    )
+    db.commit()
+    return released
+
+def claim_due_generation_slots(db: Session, now, since_day, limit: int, due_before=None):
+    """Mark up to limit pending slots due by due_before (default now) as running, oldest first; other workers skip them"""
+    slot = models.GenerationSlot
+    due = db.query(slot.id).filter(
+        slot.status == "pending", slot.due_at <= (due_before or now), slot.day >= since_day
+    ).order_by(slot.due_at).limit(limit).all()
+    claimed = []
+    for (slot_id,) in due:
+        # Conditional update: only one worker sees the row still pending
+        if db.query(slot).filter(slot.id == slot_id, slot.status == "pending").update(
+            {slot.status: "running", slot.claimed_at: now}, synchronize_session=False
+        ):
+            claimed.append(slot_id)
+    db.commit()
+    if not claimed:
+        return []
+    rows = {row.id: row for row in db.query(slot).filter(slot.id.in_(claimed))}
+    return [rows[slot_id] for slot_id in claimed]
+
+def release_generation_slot(db: Session, slot_id: int, error: str = None):
+    """Return a slot whose generation failed to the queue"""
+    slot = models.GenerationSlot
+    db.query(slot).filter(slot.id == slot_id).update({
+        slot.status: "pending", slot.claimed_at: None,
+        slot.attempts: slot.attempts + 1, slot.last_error: error,
+    }, synchronize_session=False)
+    db.commit()
+
+def get_generation_quota(db: Session, day):
+    """(category, planned, done) for one day's slots"""
+    slot = models.GenerationSlot
+    return db.query(
+        slot.category,
+        func.count(slot.id).label("planned"),
+        func.sum(case((slot.status == "done", 1), else_=0)).label("done"),
+    ).filter(slot.day == day).group_by(slot.category).order_by(slot.category).all()
+
 def delete_news_article(db: Session, article_id: int):
     article = db.query(models.NewsArticle).filter(models.NewsArticle.id == article_id).first()
     if article:
+        info = _article_info(article)
+        _bump_counters(db, _article_counter_deltas(article, -1))
+        # Explicit rather than foreign key actions: SQLite does not enforce them, and
+        # a partitioned news_articles cannot be referenced by them (see partitions.py)
+        db.query(models.ArticleTranslation).filter(
+            models.ArticleTranslation.article_id == article_id
+        ).delete(synchronize_session=False)
+        db.query(models.GenerationLog).filter(
+            models.GenerationLog.article_id == article_id
+        ).update({models.GenerationLog.article_id: None}, synchronize_session=False)
         db.delete(article)
         db.commit()
+        _notify_article_listeners("deleted", info)
         return True
     return False
 
 def get_article_count(db: Session):
-    return db.query(models.NewsArticle).count()
+    counter = db.query(models.SiteCounter.value).filter(models.SiteCounter.name == ARTICLES_COUNTER).scalar()
+    return counter or 0
 
 def get_about_content(db: Session):
     return db.query(models.AboutContent).first()
@@ -55,8 +430,72 @@ def update_about_content(db: Session, content: str, username: str = None):
     return about
 
 # Feature CRUD operations
-def get_all_features(db: Session, model):
-    return db.query(model).order_by(model.created_at.desc()).all()
+def _feature_name_key(db: Session, model):
+    """lower(name) exactly as indexed (COLLATE "C" on Postgres, see migration 0003)"""
+    key = func.lower(model.name)
+    if db.get_bind().dialect.name == "postgresql":
+        key = key.collate("C")
+    return key
+
+def _db_lower(db: Session, value: str) -> str:
+    """value lowercased the way the database's lower() does it.
+    
+    SQLite's lower() only folds ASCII, so on SQLite searches are case-insensitive
+    for ASCII letters only; Postgres folds every letter, like str.lower().
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return "".join(c.lower() if c.isascii() else c for c in value)
+    return value.lower()
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def get_features_page(db: Session, model, limit: int = 100, cursor: str = None,
+                      q: str = None, match: str = "prefix"):
+    """One page of features and the cursor for the next page (None on the last page).
+    
+    Without q, features come newest first (ids follow creation order). With q,
+    they are matched on name by prefix or substring and come in name order.
+    """
+    if not q:
+        query = db.query(model)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, (int,))
+            query = query.filter(model.id < last_id)
+        rows = query.order_by(desc(model.id)).limit(limit + 1).all()
+        next_cursor = encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+    
+    name_key = _feature_name_key(db, model)
+    needle = _db_lower(db, q)
+    query = db.query(model, name_key.label("sort_key"))
+    if match == "contains":
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite" and len(needle) >= 3:
+            # The FTS5 trigram table needs at least three characters
+            fts = f"{model.__tablename__}_name_fts"
+            query = query.filter(model.id.in_(
+                text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :fts_query").bindparams(
+                    fts_query='"' + q.replace('"', '""') + '"'
+                )
+            ))
+        else:
+            query = query.filter(func.lower(model.name).like(f"%{_escape_like(needle)}%", escape="\\"))
+    else:
+        # A range on the indexed key, so the btree serves both filter and order
+        query = query.filter(name_key >= needle)
+        if ord(needle[-1]) < 0x10FFFF:
+            query = query.filter(name_key < needle[:-1] + chr(ord(needle[-1]) + 1))
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, (str, int))
+        query = query.filter(tuple_(name_key, model.id) > tuple_(literal(last_key), literal(last_id)))
+    
+    rows = query.order_by(name_key, model.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last_feature, last_key = rows[limit - 1]
+        next_cursor = encode_cursor([last_key, last_feature.id])
+    return [feature for feature, _ in rows[:limit]], next_cursor
 
 def get_feature(db: Session, model, feature_id: int):
     return db.query(model).filter(model.id == feature_id).first()
@@ -68,6 +507,74 @@ def create_feature(db: Session, model, name: str, description: str = None, usern
     db.refresh(feature)
     return feature
 
+# Dialects whose insert() supports ON CONFLICT (idempotency keys, rate-limit
+# buckets, translations, counters and feature upserts all rely on it)
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def dialect_insert(dialect: str):
+    """insert() with ON CONFLICT support for a dialect name; checked once at startup"""
+    try:
+        return UPSERT_INSERTS[dialect]
+    except KeyError:
+        raise RuntimeError(
+            f"Unsupported database {dialect!r}: upserts need one of {', '.join(sorted(UPSERT_INSERTS))}"
+        ) from None
+
+def upsert_insert(db: Session):
+    """Dialect-specific insert() that supports ON CONFLICT"""
+    return dialect_insert(db.get_bind().dialect.name)
+
+def bulk_upsert_features(db: Session, model, items: list, username: str = None, chunk_size: int = 500):
+    """Insert or update features by name in chunked INSERT ... ON CONFLICT (name) DO UPDATE statements.
+    
+    items is a list of {"name", "description"} dicts; returns one result dict per item, in order.
+    """
+    results = [None] * len(items)
+    
+    # A name may only be written once per statement, so the last occurrence wins
+    last_index = {item["name"]: index for index, item in enumerate(items)}
+    for index, item in enumerate(items):
+        if last_index[item["name"]] != index:
+            results[index] = {"index": index, "name": item["name"], "status": "skipped",
+                              "detail": "duplicate name later in payload"}
+    unique = [(index, items[index]) for index in sorted(last_index.values())]
+    
+    insert = upsert_insert(db)
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start:start + chunk_size]
+        existing = {
+            name: (feature_id, description)
+            for feature_id, name, description in db.query(model.id, model.name, model.description).filter(
+                model.name.in_([item["name"] for _, item in chunk])
+            )
+        }
+        
+        to_write = []
+        for index, item in chunk:
+            current = existing.get(item["name"])
+            if current and current[1] == item.get("description"):
+                results[index] = {"index": index, "name": item["name"], "status": "skipped",
+                                  "id": current[0], "detail": "unchanged"}
+            else:
+                to_write.append((index, item))
+        
+        if to_write:
+            stmt = insert(model).values([
+                {"name": item["name"], "description": item.get("description"), "created_by": username}
+                for _, item in to_write
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.name],
+                set_={"description": stmt.excluded.description}
+            ).returning(model.id, model.name)
+            ids = {name: feature_id for feature_id, name in db.execute(stmt)}
+            for index, item in to_write:
+                results[index] = {"index": index, "name": item["name"], "id": ids.get(item["name"]),
+                                  "status": "updated" if item["name"] in existing else "created"}
+        db.commit()
+    
+    return results
+
 def update_feature(db: Session, model, feature_id: int, name: str, description: str = None):
     feature = db.query(model).filter(model.id == feature_id).first()
     if feature:
@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import os
+import threading
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import get_settings
 
 settings = get_settings()
@@ -10,6 +17,123 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+# Cookie set after a write; while it is valid, reads from that client go to the primary
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+# Seconds a replica is behind the primary (0 when it has replayed everything it received)
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+def _replica_engine(url: str):
+    # A replica that stops answering must not hang the requests routed to it
+    connect_args = {"connect_timeout": settings.replica_connect_timeout} if url.startswith("postgresql") else {}
+    return create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+
+class ReplicaPool:
+    """Round-robin over read replicas, skipping any that lag too far behind.
+    
+    Lag is checked by a background thread, so requests never wait on a probe.
+    """
+    
+    def __init__(self, urls, max_lag: float, check_interval: float):
+        self.engines = [_replica_engine(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.healthy = list(self.engines)
+        self._next = itertools.count()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+    
+    def lag(self, replica_engine):
+        """Replication lag in seconds, or None if the replica can't be reached"""
+        try:
+            with replica_engine.connect() as conn:
+                if replica_engine.dialect.name == "postgresql":
+                    conn.execute(text(f"SET LOCAL statement_timeout = {int(settings.replica_probe_timeout_ms)}"))
+                return float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Replica {replica_engine.url.host} unreachable: {str(e)}")
+            return None
+    
+    def refresh(self):
+        """Re-check every replica's lag and rebuild the healthy list"""
+        healthy = []
+        for replica_engine in self.engines:
+            lag = self.lag(replica_engine)
+            if lag is not None and lag <= self.max_lag:
+                healthy.append(replica_engine)
+            elif lag is not None:
+                logger.warning(f"Replica {replica_engine.url.host} is {lag:.1f}s behind, taking it out of rotation")
+        self.healthy = healthy
+    
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Replica lag check failed: {str(e)}")
+            time.sleep(self.check_interval)
+    
+    def _ensure_checker(self):
+        # Started on first use rather than at import
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="replica-lag-check", daemon=True)
+                    self._thread.start()
+    
+    def mark_failed(self, replica_engine):
+        """Take a replica that failed a read out of rotation until the next check"""
+        self.healthy = [e for e in self.healthy if e is not replica_engine]
+    
+    def pick(self):
+        """A healthy replica engine, or None if there is none"""
+        if not self.engines:
+            return None
+        self._ensure_checker()
+        healthy = self.healthy
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+class ReadSession(Session):
+    """Session for read-only endpoints that falls back to the primary if its replica fails"""
+    
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except OperationalError as e:
+            failed = self.bind
+            if failed is engine:
+                raise
+            logger.warning(f"Read on replica {failed.url.host} failed, retrying on the primary: {str(e)}")
+            replicas.mark_failed(failed)
+            # Reads only, so running the statement again elsewhere is safe
+            self.rollback()
+            self.bind = engine
+            return super().execute(*args, **kwargs)
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False, bind=engine)
+
+replicas = ReplicaPool(settings.replica_urls, settings.replica_max_lag_seconds, settings.replica_lag_check_interval)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+def init_db():
+    """Upgrade the schema to the latest migration (called at startup, never at import time)"""
+    from alembic import command
+    from alembic.config import Config
+    
+    alembic_cfg = Config(os.path.join(os.path.dirname(MIGRATIONS_DIR), "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", MIGRATIONS_DIR)
+    # Keep the application's logging configuration intact
+    alembic_cfg.attributes["configure_logger"] = False
+    command.upgrade(alembic_cfg, "head")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -17,4 +141,20 @@ def get_db():
     finally:
         db.close()
 
+def is_primary_sticky(request: Request) -> bool:
+    """True if this client wrote recently and must read its own writes"""
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica, unless the client just wrote"""
+    replica_engine = None if is_primary_sticky(request) else replicas.pick()
+    db = ReadSessionLocal(bind=replica_engine) if replica_engine is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 #test comment lan5
\ No newline at end of file
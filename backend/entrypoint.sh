@@ -11,9 +11,9 @@ done
 
 echo "✅ PostgreSQL is ready!"
 
-# Run database migrations (create tables)
-echo "📦 Creating database tables..."
-python -c "from database import engine; import models; models.Base.metadata.create_all(bind=engine)"
+# Run database migrations
+echo "📦 Running database migrations..."
+alembic upgrade head
 
 # Seed demo users if they don't exist
 echo "👥 Seeding demo users..."
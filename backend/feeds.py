@@ -0,0 +1,388 @@
+"""
+RSS/Atom feeds and sitemaps, pre-built on disk.
+
+Files under FEED_DIR (a directory in the system temp dir if unset):
+
+    feeds/all.rss, feeds/all.atom                  GET /api/feeds/{rss|atom}
+    feeds/category/<name>.rss|.atom                GET /api/feeds/{rss|atom}?category=<name>
+    sitemaps/sitemap.xml                           GET /sitemap.xml (index)
+    sitemaps/sitemap-<n>.xml                       GET /sitemap-<n>.xml
+
+Feeds hold the newest FEED_SIZE articles. Sitemap shard n lists the articles
+with n * SHARD_SIZE <= id < (n + 1) * SHARD_SIZE, so a new article only
+touches its category's feeds, the global feeds, the newest shard and the
+index. Files are written streaming and replaced atomically (only when their
+bytes changed), and served streamed from disk with a content-hash ETag.
+
+Only the background worker builds files; a request for one that doesn't
+exist (an unknown category or shard) is a 404 without touching the database.
+Workers sharing FEED_DIR take turns on the startup rebuild through a lock
+file, and one that waited for another's rebuild skips its own.
+
+Rebuild everything once with:
+    python feeds.py
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker rebuilds at startup
+    fcntl = None
+
+from config import get_settings
+import crud
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+FEED_SIZE = 50
+SHARD_SIZE = 50000  # URLs per sitemap file allowed by the sitemap protocol
+SUMMARY_LENGTH = 300
+CHUNK_SIZE = 65536
+SITE_TITLE = "Manteiv Daily News"
+ALL = "all"
+INDEX = "sitemap-index"
+
+FORMATS = {"rss": "application/rss+xml", "atom": "application/atom+xml"}
+
+# Same rule as snapshots.py: other category names get no feed file
+SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+SHARD_FILE = re.compile(r"^sitemap-(\d+)\.xml$")
+# A request for a missing file waits this long for the first full build after startup
+FIRST_BUILD_WAIT_SECONDS = 5
+REBUILD_LOCK_FILE = ".rebuild.lock"
+
+def default_directory():
+    return os.path.join(tempfile.gettempdir(), "aifakenews-feeds")
+
+def _utc(value):
+    """published_date comes back naive from SQLite"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _w3c(value) -> str:
+    return _utc(value).replace(microsecond=0).isoformat()
+
+def _summary(content: str) -> str:
+    text = " ".join((content or "").split())
+    return text if len(text) <= SUMMARY_LENGTH else text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+def article_url(article_id: int) -> str:
+    return f"{settings.site_url.rstrip('/')}/article/{article_id}"
+
+def feed_url(fmt: str, category: str = None) -> str:
+    url = f"{settings.site_url.rstrip('/')}/api/feeds/{fmt}"
+    return f"{url}?category={category}" if category else url
+
+def render_rss(articles, category: str = None):
+    """Chunks of an RSS 2.0 document for articles (newest first)"""
+    site = settings.site_url.rstrip("/")
+    title = f"{SITE_TITLE} - {category.title()}" if category else SITE_TITLE
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>\n'
+    yield f"<title>{escape(title)}</title>\n"
+    yield f"<link>{escape(f'{site}/category/{category}' if category else f'{site}/')}</link>\n"
+    yield "<description>AI generated news from Manteiv</description>\n"
+    yield f'<atom:link href={quoteattr(feed_url("rss", category))} rel="self" type="application/rss+xml"/>\n'
+    if articles:
+        # The newest article's date, not the build time, so unchanged feeds keep their bytes
+        yield f"<lastBuildDate>{format_datetime(_utc(articles[0].published_date))}</lastBuildDate>\n"
+    for article in articles:
+        url = escape(article_url(article.id))
+        yield (
+            f"<item><title>{escape(article.title)}</title><link>{url}</link>"
+            f'<guid isPermaLink="true">{url}</guid>'
+            f"<pubDate>{format_datetime(_utc(article.published_date))}</pubDate>"
+            f"<category>{escape(article.category)}</category>"
+            f"<description>{escape(_summary(article.content))}</description></item>\n"
+        )
+    yield "</channel></rss>\n"
+
+def render_atom(articles, category: str = None):
+    """Chunks of an Atom 1.0 document for articles (newest first)"""
+    site = settings.site_url.rstrip("/")
+    title = f"{SITE_TITLE} - {category.title()}" if category else SITE_TITLE
+    updated = _w3c(articles[0].published_date) if articles else "1970-01-01T00:00:00+00:00"
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f"<id>{escape(feed_url('atom', category))}</id>\n"
+    yield f"<title>{escape(title)}</title>\n"
+    yield f"<updated>{updated}</updated>\n"
+    yield f'<link rel="self" type="application/atom+xml" href={quoteattr(feed_url("atom", category))}/>\n'
+    yield f'<link rel="alternate" href={quoteattr(f"{site}/category/{category}" if category else f"{site}/")}/>\n'
+    for article in articles:
+        url = article_url(article.id)
+        published = _w3c(article.published_date)
+        yield (
+            f"<entry><id>{escape(url)}</id><title>{escape(article.title)}</title>"
+            f"<link href={quoteattr(url)}/><published>{published}</published><updated>{published}</updated>"
+            f"<author><name>{escape(article.author or 'AI News Generator')}</name></author>"
+            f"<category term={quoteattr(article.category)}/>"
+            f"<summary>{escape(_summary(article.content))}</summary></entry>\n"
+        )
+    yield "</feed>\n"
+
+def render_shard(entries):
+    """Chunks of a sitemap for (id, published_date) rows"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for article_id, published_date in entries:
+        lastmod = f"<lastmod>{_w3c(published_date)}</lastmod>" if published_date else ""
+        yield f"<url><loc>{escape(article_url(article_id))}</loc>{lastmod}</url>\n"
+    yield "</urlset>\n"
+
+def render_index(shards):
+    """Chunks of a sitemap index for (shard number, last modified) pairs"""
+    site = settings.site_url.rstrip("/")
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for shard, modified in shards:
+        yield f"<sitemap><loc>{escape(f'{site}/sitemap-{shard}.xml')}</loc><lastmod>{_w3c(modified)}</lastmod></sitemap>\n"
+    yield "</sitemapindex>\n"
+
+def iter_file(f):
+    """Stream an open file in chunks, closing it at the end"""
+    try:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        f.close()
+
+class FeedPublisher:
+    def __init__(self, directory: str, session_factory):
+        self.directory = directory
+        self.session_factory = session_factory
+        self._dirty = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._built = threading.Event()  # set once the first full build has run
+        self._etags = {}  # path -> (inode, mtime_ns, size, etag)
+        self._etags_lock = threading.Lock()
+        self.files_written = 0
+        self.files_unchanged = 0
+
+    def start(self):
+        """Start the worker and queue a full rebuild"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="feed-publisher", daemon=True)
+            self._thread.start()
+        self.mark(ALL)
+
+    def mark(self, *keys):
+        with self._cond:
+            self._dirty.update(keys)
+            self._cond.notify()
+
+    def article_changed(self, action: str, info: dict):
+        """crud article listener: rebuild the feeds and the sitemap shard this article is in"""
+        self.mark(("feed", None), ("feed", info["category"]), ("shard", info["id"] // SHARD_SIZE), INDEX)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                dirty, self._dirty = self._dirty, set()
+            try:
+                if ALL in dirty:
+                    self._publish_all_once()
+                else:
+                    self.publish(dirty)
+            except Exception as e:
+                logger.error(f"Feed publish failed: {str(e)}")
+            finally:
+                if ALL in dirty:
+                    self._built.set()
+
+    def _publish_all_once(self):
+        """Full rebuild, unless another worker sharing the directory has just done one"""
+        if fcntl is None:
+            self.publish(ALL)
+            return
+        with open(os.path.join(self.directory, REBUILD_LOCK_FILE), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is rebuilding the same files; wait for it instead of repeating it
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                return
+            self.publish(ALL)
+
+    def publish(self, keys):
+        """Build the given keys, or every feed and sitemap for ALL"""
+        db = self.session_factory()
+        try:
+            if keys == ALL:
+                self._publish_all(db)
+            else:
+                # The index lists shard files, so it goes after them
+                for key in sorted(keys, key=lambda k: k == INDEX):
+                    self._publish_key(db, key)
+        finally:
+            db.close()
+
+    def _publish_key(self, db, key):
+        if key == INDEX:
+            self._write("sitemaps/sitemap.xml", render_index(self._shards()))
+        elif key[0] == "feed":
+            self._publish_feed(db, key[1])
+        elif key[0] == "shard":
+            self._publish_shard(db, key[1])
+
+    def _feed_path(self, fmt: str, category: str = None) -> str:
+        return f"feeds/category/{category}.{fmt}" if category else f"feeds/{ALL}.{fmt}"
+
+    def _publish_feed(self, db, category: str = None):
+        if category is not None and not SAFE_NAME.match(category):
+            return
+        articles = crud.get_news_articles(db, limit=FEED_SIZE, category=category)
+        if category and not articles:
+            for fmt in FORMATS:
+                self._remove(self._feed_path(fmt, category))
+            return
+        self._write(self._feed_path("rss", category), render_rss(articles, category))
+        self._write(self._feed_path("atom", category), render_atom(articles, category))
+
+    def _publish_shard(self, db, shard: int):
+        path = f"sitemaps/sitemap-{shard}.xml"
+        entries = crud.iter_sitemap_entries(db, shard * SHARD_SIZE, (shard + 1) * SHARD_SIZE)
+        if entries.first() is None:
+            # Every article in this id range is gone
+            self._remove(path)
+            return
+        self._write(path, render_shard(entries))
+
+    def _shards(self):
+        """(shard, modified) of the shard files on disk; a shard's file only changes with its content"""
+        shards = []
+        for name in os.listdir(os.path.join(self.directory, "sitemaps")):
+            match = SHARD_FILE.match(name)
+            if match:
+                modified = os.stat(os.path.join(self.directory, "sitemaps", name)).st_mtime
+                shards.append((int(match.group(1)), datetime.fromtimestamp(modified, timezone.utc)))
+        return sorted(shards)
+
+    def _publish_all(self, db):
+        self._publish_feed(db, None)
+        prefix = crud.CATEGORY_COUNTER_PREFIX
+        categories = {
+            name[len(prefix):] for name, value in crud.get_site_counters(db).items()
+            if name.startswith(prefix) and value > 0
+        }
+        for category in categories:
+            self._publish_feed(db, category)
+        for name in os.listdir(os.path.join(self.directory, "feeds", "category")):
+            category, _, fmt = name.rpartition(".")
+            if fmt in FORMATS and category not in categories:
+                self._remove(f"feeds/category/{name}")
+
+        last_shard = crud.get_max_article_id(db) // SHARD_SIZE
+        for shard in range(last_shard + 1):
+            self._publish_shard(db, shard)
+        for shard, _ in self._shards():
+            if shard > last_shard:
+                self._remove(f"sitemaps/sitemap-{shard}.xml")
+        self._publish_key(db, INDEX)
+
+    def _write(self, relative_path: str, chunks):
+        """Stream chunks to a temp file and swap it in, unless the bytes are unchanged"""
+        path = os.path.join(self.directory, relative_path)
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    data = chunk.encode()
+                    digest.update(data)
+                    f.write(data)
+            etag = f'"{digest.hexdigest()}"'
+            if os.path.exists(path) and self._etag(path) == etag:
+                os.remove(tmp)
+                self.files_unchanged += 1
+                return
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._remember_etag(path, os.stat(path), etag)
+        self.files_written += 1
+
+    def _remember_etag(self, path: str, stat, etag: str):
+        with self._etags_lock:
+            self._etags[path] = (stat.st_ino, stat.st_mtime_ns, stat.st_size, etag)
+
+    def _etag(self, path: str, f=None) -> str:
+        """Content hash of a file, cached per inode/mtime/size (other workers write files too)"""
+        if f is None:
+            with open(path, "rb") as f:
+                return self._etag(path, f)
+        stat = os.fstat(f.fileno())
+        with self._etags_lock:
+            cached = self._etags.get(path)
+        if cached and cached[:3] == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            return cached[3]
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+        f.seek(0)
+        etag = f'"{digest.hexdigest()}"'
+        self._remember_etag(path, stat, etag)
+        return etag
+
+    def _remove(self, relative_path: str):
+        try:
+            os.remove(os.path.join(self.directory, relative_path))
+        except FileNotFoundError:
+            pass
+
+    def _open(self, relative_path: str):
+        """(open file, size, etag), or None if the worker hasn't built such a file"""
+        path = os.path.join(self.directory, relative_path)
+        for attempt in range(2):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # Right after startup the first build may still be running
+                if attempt or not self._built.wait(FIRST_BUILD_WAIT_SECONDS):
+                    return None
+                continue
+            # Everything below uses the open file, so a concurrent swap can't mix versions
+            return f, os.fstat(f.fileno()).st_size, self._etag(path, f)
+
+    def open_feed(self, fmt: str, category: str = None):
+        if fmt not in FORMATS or (category is not None and not SAFE_NAME.match(category)):
+            return None
+        return self._open(self._feed_path(fmt, category))
+
+    def open_sitemap(self, shard: int = None):
+        if shard is None:
+            return self._open("sitemaps/sitemap.xml")
+        return self._open(f"sitemaps/sitemap-{shard}.xml")
+
+def create_publisher(directory: str = None):
+    """Publisher wired to crud's article listeners; call start() to begin publishing"""
+    from database import SessionLocal
+    directory = directory or default_directory()
+    os.makedirs(os.path.join(directory, "feeds", "category"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "sitemaps"), exist_ok=True)
+    publisher = FeedPublisher(directory, SessionLocal)
+    crud.add_article_listener(publisher.article_changed)
+    return publisher
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    publisher = create_publisher(settings.feed_dir)
+    publisher.publish(ALL)
+    print(f"✅ Wrote {publisher.files_written} files ({publisher.files_unchanged} unchanged) to {publisher.directory}")
@@ -0,0 +1,182 @@
+"""
+Spread-out daily generation (GENERATION_SCHEDULE=spread).
+
+Instead of generating every article at 06:00, each day gets a plan of slots:
+GENERATION_QUOTAS articles per category, interleaved and spaced evenly across
+GENERATION_WINDOW with some jitter. The plan is derived from the date, so every
+worker and every restart computes the same one, and it is stored in
+generation_slots, which also records which slots are done.
+
+scheduler.run_generation_slots ticks every minute and generates the slots that
+are due. After downtime, overdue slots (from today and GENERATION_CATCHUP_DAYS
+before) are caught up at GENERATION_CATCHUP_PER_TICK per tick. While the
+provider is failing the tick backs off exponentially, and no template fallback
+article is published; the slot stays pending instead.
+
+Show a day's plan without generating anything:
+    python generation_slots.py [YYYY-MM-DD]
+"""
+from datetime import date, datetime, timedelta, timezone
+import argparse
+import logging
+import random
+import threading
+from database import SessionLocal
+from ai_service import ai_generator, CATEGORIES
+from config import get_settings
+import crud
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# A running slot whose worker hasn't finished after this long is put back
+STALE_AFTER = timedelta(minutes=15)
+BACKOFF_BASE_SECONDS = 60
+
+_planned_days = set()
+_state_lock = threading.Lock()
+_consecutive_failures = 0
+_backoff_until = None
+
+def daily_quotas():
+    """{category: articles per day}"""
+    return settings.generation_quota_map or {category: 1 for category in CATEGORIES}
+
+def plan_day(day: date, quotas: dict = None):
+    """The day's slots as generation_slots rows, the same on every call for the same day"""
+    quotas = quotas if quotas is not None else daily_quotas()
+    rng = random.Random(day.isoformat())
+    categories = [category for category, count in sorted(quotas.items()) for _ in range(count)]
+    rng.shuffle(categories)
+    if not categories:
+        return []
+    start_hour, end_hour = settings.generation_window_hours
+    # Local wall-clock hours of that day, stored in UTC
+    window_start = datetime(day.year, day.month, day.day).astimezone() + timedelta(hours=start_hour)
+    window = timedelta(hours=end_hour - start_hour)
+    spacing = window / len(categories)
+    jitter = spacing * min(max(settings.generation_slot_jitter, 0.0), 0.5)
+    rows = []
+    for slot, category in enumerate(categories):
+        offset = spacing * (slot + 0.5) + jitter * rng.uniform(-1, 1)
+        rows.append({
+            "day": day,
+            "slot": slot,
+            "category": category,
+            # Every 3rd article features the billionaire
+            "include_billionaire": slot % 3 == 0,
+            "due_at": (window_start + offset).astimezone(timezone.utc),
+            "status": "pending",
+            "attempts": 0,
+        })
+    return rows
+
+def _ensure_plans(db, today: date):
+    for offset in range(max(0, settings.generation_catchup_days), -1, -1):
+        day = today - timedelta(days=offset)
+        if day not in _planned_days:
+            crud.create_generation_slots(db, plan_day(day))
+            _planned_days.add(day)
+
+def _end_of_day(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day).astimezone() + timedelta(days=1)
+
+def _record_outcome(failed: bool, now: datetime):
+    global _consecutive_failures, _backoff_until
+    with _state_lock:
+        if not failed:
+            _consecutive_failures, _backoff_until = 0, None
+            return
+        _consecutive_failures += 1
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (_consecutive_failures - 1), settings.generation_backoff_max_seconds)
+        _backoff_until = now + timedelta(seconds=delay)
+    logger.warning(f"Generation failing ({_consecutive_failures} in a row); pausing slots for {delay}s")
+
+def run_due_slots(now: datetime = None, upcoming: bool = False) -> int:
+    """Generate the slots that are due (at most GENERATION_CATCHUP_PER_TICK); returns articles stored
+
+    With upcoming=True, today's later slots are taken early too (seeding an empty site).
+    """
+    now = now or datetime.now(timezone.utc)
+    with _state_lock:
+        if _backoff_until is not None and now < _backoff_until:
+            return 0
+    today = now.astimezone().date()
+    db = SessionLocal()
+    try:
+        _ensure_plans(db, today)
+        crud.release_stale_generation_slots(db, now - STALE_AFTER)
+        slots = [
+            (slot.id, {"category": slot.category, "include_billionaire": slot.include_billionaire})
+            for slot in crud.claim_due_generation_slots(
+                db, now, today - timedelta(days=max(0, settings.generation_catchup_days)),
+                limit=max(1, settings.generation_catchup_per_tick),
+                due_before=_end_of_day(today) if upcoming else None
+            )
+        ]
+    finally:
+        db.close()
+    if not slots:
+        return 0
+
+    specs = [spec for _, spec in slots]
+    error = None
+    try:
+        # Several overdue slots are caught up with one multi-article call
+        if len(specs) > 1:
+            results = ai_generator.generate_news_batch(specs, source="scheduler")
+        else:
+            results = [ai_generator.generate_news(**specs[0])]
+    except Exception as e:
+        results, error = [None] * len(specs), str(e)
+        logger.error(f"Error generating slots: {str(e)}")
+
+    stored, failed = 0, False
+    db = SessionLocal()
+    try:
+        for (slot_id, spec), news_data in zip(slots, results):
+            generation = (news_data or {}).get("generation") or {}
+            if news_data is None or generation.get("fell_back"):
+                # Keep the calls in the usage log, but don't publish the template text
+                for row in (news_data or {}).get("failed_generations", []) + ([generation] if generation else []):
+                    crud.log_generation(db, {**row, "fell_back": False}, source="scheduler")
+                crud.release_generation_slot(db, slot_id, generation.get("error") or error)
+                failed = True
+                continue
+            news_data["is_featured"] = random.random() < 0.3
+            article = crud.create_generated_article(db, news_data, source="scheduler", slot_id=slot_id)
+            stored += 1
+            logger.info(f"Created article for {spec['category']} slot: {article.title}")
+    finally:
+        db.close()
+    _record_outcome(failed, now)
+    return stored
+
+def stats():
+    """Today's quota progress and the backoff state, for /api/metrics"""
+    db = SessionLocal()
+    try:
+        today = datetime.now().astimezone().date()
+        quota = {
+            row.category: {"planned": row.planned, "done": int(row.done or 0)}
+            for row in crud.get_generation_quota(db, today)
+        }
+    finally:
+        db.close()
+    with _state_lock:
+        return {
+            "schedule": settings.generation_schedule,
+            "day": today.isoformat(),
+            "quota": quota,
+            "consecutive_failures": _consecutive_failures,
+            "backoff_until": _backoff_until.isoformat() if _backoff_until else None,
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the generation slots planned for a day")
+    parser.add_argument("day", nargs="?", default=None, help="YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+    day = date.fromisoformat(args.day) if args.day else datetime.now().astimezone().date()
+    for row in plan_day(day):
+        billionaire = " (billionaire)" if row["include_billionaire"] else ""
+        print(f"{row['slot']:3} {row['due_at'].astimezone():%H:%M} {row['category']}{billionaire}")
@@ -0,0 +1,215 @@
+"""
+Idempotency-Key support for the create and generate endpoints.
+
+The first request with a given key (per user, or per IP when anonymous) runs
+normally and its response is stored. A retry with the same key and body gets
+the stored response (status, headers and body) replayed; a retry that arrives
+while the original is still running waits for it instead of starting a second
+LLM call or insert. The running original refreshes its claim every
+HEARTBEAT_SECONDS, so only a worker that died loses it. Responses that ask the
+client to come back later (5xx, 409, 429 or anything with Retry-After) are not
+stored, so the retry runs again. Keys expire after IDEMPOTENCY_TTL_HOURS
+(scheduler.purge_idempotency_keys).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from rate_limit import RateLimiter
+import models
+
+settings = get_settings()
+
+ROUTES = {("POST", "/api/news"), ("POST", "/api/news/generate")}
+MAX_KEY_LENGTH = 200
+POLL_SECONDS = 0.25
+HEARTBEAT_SECONDS = max(1.0, settings.idempotency_lock_seconds / 3)
+# Retryable outcomes, released instead of replayed
+TRANSIENT_STATUSES = {409, 429}
+# Regenerated on replay rather than copied from the original
+UNSTORED_HEADERS = {"content-length", "content-type", "date", "server", "transfer-encoding", "connection"}
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+# claim() outcomes besides IN_PROGRESS and COMPLETED
+OWNER = "owner"
+MISMATCH = "mismatch"
+
+class IdempotencyStore:
+    """Keys in the idempotency_keys table - shared by every worker"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def _filter(self, db: Session, scope: str, key: str):
+        return db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.scope == scope, models.IdempotencyKey.key == key
+        )
+
+    def claim(self, scope: str, key: str, request_hash: str, now: float):
+        """Try to become the request that runs; returns (outcome, stored response or None)"""
+        import crud
+        db: Session = self.session_factory()
+        try:
+            insert = crud.upsert_insert(db)
+            stmt = insert(models.IdempotencyKey).values(
+                scope=scope, key=key, request_hash=request_hash,
+                status=IN_PROGRESS, created_at=now, updated_at=now
+            ).on_conflict_do_nothing(index_elements=["scope", "key"])
+            if db.execute(stmt).rowcount:
+                db.commit()
+                return OWNER, None
+            row = self._filter(db, scope, key).first()
+            if row is None:
+                # Released by a failed original between the insert and the read
+                db.rollback()
+                return IN_PROGRESS, None
+            if row.request_hash != request_hash:
+                return MISMATCH, None
+            if row.status == COMPLETED:
+                return COMPLETED, (
+                    row.response_status, row.response_content_type, row.response_body,
+                    json.loads(row.response_headers or "[]")
+                )
+            if now - row.updated_at > settings.idempotency_lock_seconds:
+                # The original's worker died; take the key over
+                taken = self._filter(db, scope, key).filter(
+                    models.IdempotencyKey.status == IN_PROGRESS,
+                    models.IdempotencyKey.updated_at == row.updated_at
+                ).update({models.IdempotencyKey.updated_at: now}, synchronize_session=False)
+                db.commit()
+                if taken:
+                    return OWNER, None
+            return IN_PROGRESS, None
+        finally:
+            db.close()
+
+    def heartbeat(self, scope: str, key: str, now: float):
+        """Keep an unfinished key claimed while its request is still running"""
+        db: Session = self.session_factory()
+        try:
+            self._filter(db, scope, key).filter(models.IdempotencyKey.status == IN_PROGRESS).update(
+                {models.IdempotencyKey.updated_at: now}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def complete(self, scope: str, key: str, status_code: int, content_type: Optional[str], body: str,
+                 headers: list = None):
+        db: Session = self.session_factory()
+        try:
+            self._filter(db, scope, key).update({
+                models.IdempotencyKey.status: COMPLETED,
+                models.IdempotencyKey.response_status: status_code,
+                models.IdempotencyKey.response_content_type: content_type,
+                models.IdempotencyKey.response_body: body,
+                models.IdempotencyKey.response_headers: json.dumps(headers or []),
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def release(self, scope: str, key: str):
+        """Forget a key whose request failed, so a retry runs it again"""
+        db: Session = self.session_factory()
+        try:
+            self._filter(db, scope, key).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def purge(self, before: float) -> int:
+        db: Session = self.session_factory()
+        try:
+            deleted = db.query(models.IdempotencyKey).filter(
+                models.IdempotencyKey.created_at < before
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+def _scope(request) -> str:
+    client_host = request.client.host if request.client else None
+    user = RateLimiter.user_id(request.headers)
+    principal = f"user:{user}" if user else f"ip:{RateLimiter.client_ip(request.headers, client_host)}"
+    return f"{request.method} {request.url.path} {principal}"
+
+async def _single_chunk(content: bytes):
+    yield content
+
+async def _heartbeat(store: IdempotencyStore, scope: str, key: str):
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        await run_in_threadpool(store.heartbeat, scope, key, time.time())
+
+def _is_transient(response) -> bool:
+    """True for responses that tell the client to retry later"""
+    return (response.status_code >= 500 or response.status_code in TRANSIENT_STATUSES
+            or "retry-after" in response.headers)
+
+async def handle(store: IdempotencyStore, request, call_next):
+    """HTTP middleware body: run, replay or coalesce requests carrying an Idempotency-Key"""
+    key = request.headers.get("idempotency-key")
+    if not key or (request.method, request.url.path.rstrip("/")) not in ROUTES:
+        return await call_next(request)
+    if len(key) > MAX_KEY_LENGTH:
+        return JSONResponse(status_code=400, content={"detail": f"Idempotency-Key is longer than {MAX_KEY_LENGTH} characters"})
+
+    scope = _scope(request)
+    request_hash = hashlib.sha256(await request.body()).hexdigest()
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    while True:
+        outcome, stored = await run_in_threadpool(store.claim, scope, key, request_hash, time.time())
+        if outcome == OWNER:
+            break
+        if outcome == MISMATCH:
+            return JSONResponse(
+                status_code=422,
+                content={"detail": "Idempotency-Key was already used with a different request"}
+            )
+        if outcome == COMPLETED:
+            status_code, content_type, body, headers = stored
+            response = Response(content=body, status_code=status_code, media_type=content_type)
+            for name, value in headers:
+                response.headers.append(name, value)
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+        if time.monotonic() >= deadline:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still in progress"},
+                headers={"Retry-After": "5"}
+            )
+        await asyncio.sleep(POLL_SECONDS)
+
+    heartbeat = asyncio.create_task(_heartbeat(store, scope, key))
+    try:
+        response = await call_next(request)
+        content = b"".join([chunk async for chunk in response.body_iterator])
+    except Exception:
+        await run_in_threadpool(store.release, scope, key)
+        raise
+    finally:
+        heartbeat.cancel()
+    response.body_iterator = _single_chunk(content)
+    if _is_transient(response):
+        await run_in_threadpool(store.release, scope, key)
+        return response
+    headers = [[name, value] for name, value in response.headers.items() if name not in UNSTORED_HEADERS]
+    await run_in_threadpool(
+        store.complete, scope, key, response.status_code, response.headers.get("content-type"),
+        content.decode("utf-8", errors="replace"), headers
+    )
+    return response
+
+def purge_expired(store: IdempotencyStore) -> int:
+    return store.purge(time.time() - settings.idempotency_ttl_hours * 3600)
@@ -0,0 +1,237 @@
+"""
+Image ingestion pipeline.
+
+Uploads and downloaded article image_urls are stored once per SHA-256 under
+MEDIA_DIR, next to resized WebP and JPEG variants. Every file name contains
+the content hash, so nginx serves them with immutable cache headers:
+
+    images/ab/<sha256>.<ext>            original
+    images/ab/<sha256>-640w.webp        variant (and -640w.jpg)
+
+image_urls are fetched only from public addresses: every hop's host is resolved
+and checked before connecting, and the connection goes to the checked address,
+so articles can't point the server at internal services.
+
+Decoding and resizing run in a process pool. Works fully offline on local files:
+    python images.py photo.jpg [more.png ...]
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
+import io
+import ipaddress
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import warnings
+from config import get_settings
+import crud
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Pillow format name -> extension of the stored original
+ORIGINAL_EXTENSIONS = {"jpeg": "jpg", "png": "png", "webp": "webp", "gif": "gif"}
+VARIANT_FORMATS = (("webp", "webp", {"quality": 80, "method": 4}), ("jpeg", "jpg", {"quality": 82, "optimize": True, "progressive": True}))
+
+# Article images are skipped for the rest of the process after this many failed downloads
+MAX_ATTEMPTS = 3
+MAX_REDIRECTS = 5
+_failures = {}  # article_id -> failed attempts
+_failures_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """Worker processes, started on first use (spawned, so no scheduler threads are forked)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.image_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def _save_atomic(image, path: str, pil_format: str, options: dict) -> int:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, pil_format, **options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+def process_image(staged_path: str, sha256: str, media_dir: str, widths: list) -> dict:
+    """Validate a staged file, move it to its content address and render variants (runs in the pool)"""
+    from PIL import Image as PILImage, ImageOps
+
+    with open(staged_path, "rb") as f:
+        data = f.read()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", PILImage.DecompressionBombWarning)
+            with PILImage.open(io.BytesIO(data)) as probe:
+                probe.verify()
+            image = PILImage.open(io.BytesIO(data))
+            image.load()
+    except Exception as e:
+        raise ValueError(f"Not a supported image: {str(e)}")
+    pil_format = (image.format or "").lower()
+    if pil_format not in ORIGINAL_EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {image.format}")
+    image = ImageOps.exif_transpose(image)
+
+    relative_dir = f"images/{sha256[:2]}"
+    os.makedirs(os.path.join(media_dir, relative_dir), exist_ok=True)
+    original = f"{relative_dir}/{sha256}.{ORIGINAL_EXTENSIONS[pil_format]}"
+    os.replace(staged_path, os.path.join(media_dir, original))
+
+    # Never upscale: widths above the original collapse into one full-size variant
+    variants = []
+    for width in sorted({min(w, image.width) for w in widths}):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), PILImage.LANCZOS) if width != image.width else image
+        for variant_format, extension, options in VARIANT_FORMATS:
+            frame = resized
+            if variant_format == "jpeg" and frame.mode != "RGB":
+                # JPEG has no alpha channel: flatten onto white
+                background = PILImage.new("RGB", frame.size, (255, 255, 255))
+                rgba = frame.convert("RGBA")
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                frame = background
+            elif frame.mode not in ("RGB", "RGBA"):
+                frame = frame.convert("RGBA")
+            path = f"{relative_dir}/{sha256}-{width}w.{extension}"
+            size = _save_atomic(frame, os.path.join(media_dir, path), variant_format.upper(), options)
+            variants.append({"width": width, "height": height, "format": variant_format, "bytes": size, "path": path})
+
+    return {
+        "sha256": sha256,
+        "format": pil_format,
+        "width": image.width,
+        "height": image.height,
+        "bytes": len(data),
+        "path": original,
+        "variants": variants,
+    }
+
+def ingest_bytes(db, data: bytes, source_url: str = None):
+    """Store image bytes (deduplicated by hash) and return the Image row"""
+    if not settings.media_dir:
+        raise RuntimeError("MEDIA_DIR is not configured")
+    if len(data) > settings.image_max_bytes:
+        raise ValueError(f"Image is larger than {settings.image_max_bytes} bytes")
+    sha256 = hashlib.sha256(data).hexdigest()
+    existing = crud.get_image_by_hash(db, sha256)
+    if existing:
+        return existing
+
+    staging_dir = os.path.join(settings.media_dir, "staging")
+    os.makedirs(staging_dir, exist_ok=True)
+    fd, staged_path = tempfile.mkstemp(dir=staging_dir)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    try:
+        metadata = _get_pool().submit(
+            process_image, staged_path, sha256, settings.media_dir, settings.image_variant_width_list
+        ).result()
+    finally:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+    return crud.create_image(db, metadata, source_url=source_url)
+
+def _public_address(host: str, port: int) -> str:
+    """An address host resolves to; ValueError if any of them is not public"""
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve {host}: {str(e)}")
+    for address in addresses:
+        # Loopback, private, link-local (cloud metadata), multicast, reserved...
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError(f"Refusing to fetch from non-public address {address} ({host})")
+    return addresses[0]
+
+def download(url: str) -> bytes:
+    """Fetch an image over HTTP(S) from a public address, refusing anything over image_max_bytes"""
+    import httpx
+
+    with httpx.Client(timeout=settings.image_fetch_timeout, follow_redirects=False) as client:
+        for _ in range(MAX_REDIRECTS + 1):
+            target = httpx.URL(url)
+            if target.scheme not in ("http", "https") or not target.host:
+                raise ValueError(f"Unsupported image URL: {url}")
+            address = _public_address(target.host, target.port or (443 if target.scheme == "https" else 80))
+            # Connect to the address that was checked, not whatever a second lookup returns
+            request = client.build_request(
+                "GET", target.copy_with(host=address),
+                headers={"Host": target.netloc.decode("ascii")},
+                extensions={"sni_hostname": target.host}
+            )
+            response = client.send(request, stream=True)
+            try:
+                if response.is_redirect:
+                    # Every hop goes through the same check
+                    url = str(target.join(response.headers["location"]))
+                    continue
+                response.raise_for_status()
+                chunks, size = [], 0
+                for chunk in response.iter_bytes():
+                    size += len(chunk)
+                    if size > settings.image_max_bytes:
+                        raise ValueError(f"Image is larger than {settings.image_max_bytes} bytes")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+            finally:
+                response.close()
+    raise ValueError(f"Too many redirects fetching {url}")
+
+def ingest_article_images(db, limit: int = 10) -> int:
+    """Download and ingest image_urls of articles that have no stored image yet"""
+    with _failures_lock:
+        exclude = [article_id for article_id, count in _failures.items() if count >= MAX_ATTEMPTS]
+    pending = [(a.id, a.image_url) for a in crud.get_articles_missing_images(db, limit=limit, exclude_ids=exclude)]
+    ingested = 0
+    for article_id, url in pending:
+        try:
+            image = ingest_bytes(db, download(url), source_url=url)
+        except Exception as e:
+            db.rollback()
+            with _failures_lock:
+                _failures[article_id] = _failures.get(article_id, 0) + 1
+            logger.warning(f"Ingesting image for article {article_id} failed: {str(e)}")
+            continue
+        crud.set_article_image(db, article_id, image.id)
+        ingested += 1
+    return ingested
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Ingest local image files into MEDIA_DIR")
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        for path in args.paths:
+            with open(path, "rb") as f:
+                image = ingest_bytes(db, f.read(), source_url=None)
+            print(f"{path}: image {image.id} {image.width}x{image.height} {image.url}")
+            for variant in image.variants:
+                print(f"    {variant.width}x{variant.height} {variant.format:4} {variant.bytes:>8} {variant.url}")
+    finally:
+        db.close()
+        shutdown_pool()
@@ -1,20 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from dataclasses import dataclass
 from typing import List, Optional
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+from pydantic import ValidationError
 import models
 import schemas
 import crud
-from database import engine, get_db
-from ai_service import ai_generator
-from scheduler import start_scheduler
+from database import engine, init_db, get_db, get_read_db, SessionLocal, PRIMARY_STICKY_COOKIE
+from ai_service import ai_generator, estimate_cost
+from scheduler import start_scheduler, stop_scheduler, flush_counters
+from config import get_settings
+from rate_limit import create_rate_limiter, MemoryBucketStore
+from broadcast import hub, format_sse
 import auth
+import feeds
+import generation_slots
+import idempotency
+import profiling
+import images
+import snapshots
+import translations
+import asyncio
+import json
 import logging
+import math
+import time
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+settings = get_settings()
 
 app = FastAPI(
     title="AI Fake News Generator",
@@ -29,21 +46,90 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 
+# Read-your-writes: after a successful write, pin the client's reads to the primary
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+@app.middleware("http")
+async def primary_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(time.time() + settings.replica_sticky_seconds),
+            max_age=settings.replica_sticky_seconds,
+            httponly=True,
+            samesite="lax"
+        )
+    return response
+
+# Token-bucket limits on the LLM generation and login endpoints
+rate_limiter = create_rate_limiter()
+
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    rule = rate_limiter.rule_for(request.method, request.url.path) if settings.rate_limit_enabled else None
+    if rule is not None:
+        client_host = request.client.host if request.client else None
+        if isinstance(rate_limiter.store, MemoryBucketStore):
+            wait = rate_limiter.check(rule, request.headers, client_host)
+        else:
+            wait = await run_in_threadpool(rate_limiter.check, rule, request.headers, client_host)
+        if wait:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(max(1, math.ceil(wait)))}
+            )
+    return await call_next(request)
+
+# Retries with the same Idempotency-Key replay the first response instead of
+# running the LLM call or insert again; outside the rate limiter so replays are free
+idempotency_store = idempotency.IdempotencyStore(SessionLocal)
+
+@app.middleware("http")
+async def idempotency_keys(request: Request, call_next):
+    return await idempotency.handle(idempotency_store, request, call_next)
+
+# Opt-in request profiling; nothing is installed unless enabled
+if settings.profiling_enabled:
+    profiling.install(app)
+
+# RSS/Atom feeds and sitemaps, rebuilt incrementally as articles change
+feed_publisher = feeds.create_publisher(settings.feed_dir)
+snapshot_publisher = snapshots.create_publisher(settings.snapshot_dir) if settings.snapshot_dir else None
+
 # Start the scheduler
 scheduler = None
 
 @app.on_event("startup")
 async def startup_event():
     global scheduler
-    scheduler = start_scheduler()
+    # Fail at startup, not on the first write, if the database can't do upserts
+    crud.dialect_insert(engine.dialect.name)
+    if settings.auto_create_schema:
+        init_db()
+    if snapshot_publisher:
+        snapshot_publisher.start()
+    feed_publisher.start()
+    # Push article events to SSE/WebSocket subscribers
+    hub.bind(asyncio.get_running_loop())
+    crud.add_article_listener(hub.article_changed)
+    # Initial seeding runs as a scheduler job, so the app is ready immediately
+    scheduler = start_scheduler(seed_if_empty=settings.seed_on_startup, rate_limiter=rate_limiter)
     logging.info("Application started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    global scheduler
+    crud.remove_article_listener(hub.article_changed)
     if scheduler:
-        scheduler.shutdown()
+        stop_scheduler(scheduler)
+        scheduler = None
+    flush_counters()
+    images.shutdown_pool()
     logging.info("Application shutdown")
 
 @app.get("/")
@@ -53,29 +139,134 @@ def read_root():
         "docs": "/docs"
     }
 
+@app.get("/api/health")
+def health():
+    """Readiness probe - answers as soon as startup has finished"""
+    return {"status": "ok"}
+
+def _localize(db: Session, articles: list, accept_language: Optional[str], response: Response):
+    """Swap in stored translations for the locale negotiated from Accept-Language"""
+    locale = translations.negotiate_locale(accept_language)
+    response.headers["Vary"] = "Accept-Language"
+    items = [schemas.NewsArticle.model_validate(a).model_copy(update={"locale": settings.source_locale}) for a in articles]
+    if locale != settings.source_locale:
+        found = crud.get_article_translations(db, [item.id for item in items], locale)
+        items = [
+            item.model_copy(update={"title": found[item.id].title, "content": found[item.id].content, "locale": locale})
+            if item.id in found else item
+            for item in items
+        ]
+    response.headers["Content-Language"] = ", ".join(sorted({item.locale for item in items})) or locale
+    return items
+
 @app.get("/api/news", response_model=List[schemas.NewsArticle])
 def get_news(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    accept_language: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all news articles with optional filtering"""
+    """Get all news articles with optional filtering, in the requested language where translated"""
     articles = crud.get_news_articles(db, skip=skip, limit=limit, category=category)
-    return articles
+    return _localize(db, articles, accept_language, response)
 
 @app.get("/api/news/featured", response_model=List[schemas.NewsArticle])
-def get_featured_news(limit: int = 5, db: Session = Depends(get_db)):
+def get_featured_news(
+    response: Response,
+    limit: int = 5,
+    accept_language: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
     """Get featured news articles"""
-    return crud.get_featured_news(db, limit=limit)
+    return _localize(db, crud.get_featured_news(db, limit=limit), accept_language, response)
+
+# Upper bounds on ids per batch request (query strings are limited by nginx)
+MAX_BATCH_IDS_GET = 100
+MAX_BATCH_IDS_POST = 1000
+
+def _fetch_news_batch(db: Session, ids: List[int], max_ids: int):
+    """Resolve ids in one query, preserving the requested order and reporting missing ids"""
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) > max_ids:
+        raise HTTPException(status_code=400, detail=f"Too many ids (max {max_ids})")
+    found = crud.get_news_articles_by_ids(db, unique_ids)
+    return {
+        "articles": [found[i] for i in unique_ids if i in found],
+        "missing": [i for i in unique_ids if i not in found]
+    }
+
+@app.get("/api/news/batch", response_model=schemas.NewsBatchResponse)
+def get_news_batch(ids: str, db: Session = Depends(get_db)):
+    """Get many news articles by comma-separated IDs in one round trip"""
+    try:
+        article_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    return _fetch_news_batch(db, article_ids, MAX_BATCH_IDS_GET)
+
+@app.post("/api/news/batch", response_model=schemas.NewsBatchResponse)
+def post_news_batch(request: schemas.NewsBatchRequest, db: Session = Depends(get_db)):
+    """Get many news articles by ID in one round trip (for long ID lists)"""
+    return _fetch_news_batch(db, request.ids, MAX_BATCH_IDS_POST)
+
+# Live article events; heartbeats keep idle connections open through proxies
+STREAM_HEARTBEAT_SECONDS = 15
+
+@app.get("/api/news/stream")
+async def stream_news(request: Request):
+    """Server-sent events for created and deleted articles (resumes from Last-Event-ID)"""
+    last_event_id = request.headers.get("last-event-id", "")
+    subscriber = hub.subscribe(int(last_event_id) if last_event_id.isdigit() else None)
+    
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                batch = await subscriber.next_events(STREAM_HEARTBEAT_SECONDS)
+                if not batch:
+                    yield ": ping\n\n"
+                for event in batch:
+                    yield format_sse(event)
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/news/ws")
+async def news_websocket(websocket: WebSocket):
+    """WebSocket variant of /api/news/stream"""
+    await websocket.accept()
+    subscriber = hub.subscribe()
+    try:
+        while True:
+            batch = await subscriber.next_events(STREAM_HEARTBEAT_SECONDS)
+            for event in batch or [{"type": "ping"}]:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logging.info(f"WebSocket stream closed: {e!r}")
+    finally:
+        hub.unsubscribe(subscriber)
 
 @app.get("/api/news/{article_id}", response_model=schemas.NewsArticle)
-def get_news_article(article_id: int, db: Session = Depends(get_db)):
-    """Get a specific news article by ID"""
+def get_news_article(
+    article_id: int,
+    response: Response,
+    accept_language: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Get a specific news article by ID, in the requested language where translated"""
     article = crud.get_news_article(db, article_id)
     if article is None:
         raise HTTPException(status_code=404, detail="Article not found")
-    return article
+    return _localize(db, [article], accept_language, response)[0]
 
 @app.post("/api/news/generate", response_model=schemas.NewsArticle)
 def generate_news(
@@ -91,8 +282,7 @@ def generate_news(
             include_billionaire=request.include_billionaire
         )
         
-        article = schemas.NewsArticleCreate(**news_data)
-        db_article = crud.create_news_article(db, article)
+        db_article = crud.create_generated_article(db, news_data, source="api")
         return db_article
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating news: {str(e)}")
@@ -100,8 +290,35 @@ def generate_news(
 @app.post("/api/news", response_model=schemas.NewsArticle)
 def create_news(article: schemas.NewsArticleCreate, db: Session = Depends(get_db)):
     """Create a new news article manually"""
+    if article.image_id is not None and crud.get_image(db, article.image_id) is None:
+        raise HTTPException(status_code=400, detail="Image not found")
     return crud.create_news_article(db, article)
 
+@app.post("/api/images", response_model=schemas.Image)
+def upload_image(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_author_or_admin)
+):
+    """Upload an article image; stored once per content hash with resized variants (Admin/Author only)"""
+    if not settings.media_dir:
+        raise HTTPException(status_code=503, detail="Image storage is not configured")
+    data = file.file.read(settings.image_max_bytes + 1)
+    if len(data) > settings.image_max_bytes:
+        raise HTTPException(status_code=413, detail=f"Image is larger than {settings.image_max_bytes} bytes")
+    try:
+        return images.ingest_bytes(db, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/images/{image_id}", response_model=schemas.Image)
+def get_image(image_id: int, db: Session = Depends(get_read_db)):
+    """Get an image with its variant URLs and dimensions"""
+    image = crud.get_image(db, image_id)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return image
+
 @app.delete("/api/news/{article_id}")
 def delete_news(article_id: int, db: Session = Depends(get_db)):
     """Delete a news article"""
@@ -110,6 +327,39 @@ def delete_news(article_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Article not found")
     return {"message": "Article deleted successfully"}
 
+def _prebuilt_response(opened, media_type: str, if_none_match: Optional[str]):
+    """Stream a pre-built feed/sitemap file, or 304 when the client's ETag matches"""
+    if opened is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    f, size, etag = opened
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if if_none_match and (if_none_match.strip() == "*" or etag in [
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    ]):
+        f.close()
+        return Response(status_code=304, headers=headers)
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(feeds.iter_file(f), media_type=media_type, headers=headers)
+
+@app.get("/api/feeds/{fmt}")
+def get_feed(fmt: str, category: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    """RSS ("rss") or Atom ("atom") feed of the newest articles, optionally for one category"""
+    if fmt not in feeds.FORMATS:
+        raise HTTPException(status_code=404, detail="Feed format must be rss or atom")
+    return _prebuilt_response(feed_publisher.open_feed(fmt, category), feeds.FORMATS[fmt], if_none_match)
+
+@app.get("/api/sitemap.xml")
+def get_sitemap_index(if_none_match: Optional[str] = Header(None)):
+    """Sitemap index listing the article sitemap shards (nginx serves it as /sitemap.xml)"""
+    return _prebuilt_response(feed_publisher.open_sitemap(), "application/xml", if_none_match)
+
+@app.get("/api/sitemap-{shard}.xml")
+def get_sitemap_shard(shard: int, if_none_match: Optional[str] = Header(None)):
+    """One sitemap shard of up to 50,000 article URLs"""
+    if shard < 0:
+        raise HTTPException(status_code=404, detail="Not found")
+    return _prebuilt_response(feed_publisher.open_sitemap(shard), "application/xml", if_none_match)
+
 @app.get("/api/categories")
 def get_categories():
     """Get all available news categories"""
@@ -117,14 +367,78 @@ def get_categories():
     return {"categories": CATEGORIES}
 
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """Get website statistics"""
-    total_articles = crud.get_article_count(db)
+def get_stats(db: Session = Depends(get_read_db)):
+    """Get website statistics (read from incrementally maintained counters)"""
+    counters = crud.get_site_counters(db)
+    prefix = crud.CATEGORY_COUNTER_PREFIX
     return {
-        "total_articles": total_articles,
+        "total_articles": counters.get(crud.ARTICLES_COUNTER, 0),
+        "featured_articles": counters.get(crud.FEATURED_COUNTER, 0),
+        "total_views": counters.get(crud.VIEWS_COUNTER, 0),
+        "articles_by_category": {
+            name[len(prefix):]: value for name, value in counters.items()
+            if name.startswith(prefix) and value > 0
+        },
         "country": "Manteiv"
     }
 
+@app.get("/api/metrics")
+def get_metrics(current_user: models.User = Depends(auth.require_admin)):
+    """Operational metrics (Admin only)"""
+    return {
+        "rate_limits": rate_limiter.stats(),
+        "broadcast": hub.stats(),
+        "generation": generation_slots.stats() if settings.generation_schedule == "spread" else {"schedule": settings.generation_schedule}
+    }
+
+@app.get("/api/admin/generation-usage")
+def get_generation_usage(
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    """LLM calls, tokens, parse failures, fallbacks and estimated cost per day and category (Admin only)"""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    usage = []
+    for row in crud.get_generation_usage(db, since):
+        usage.append({
+            "day": str(row.day),
+            "category": row.category,
+            "provider": row.provider,
+            "model": row.model,
+            "calls": row.calls,
+            "parse_failures": row.parse_failures,
+            "fallbacks": row.fallbacks,
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "avg_latency_ms": round(row.avg_latency_ms or 0),
+            "cost_usd": round(estimate_cost(row.model, row.prompt_tokens, row.completion_tokens), 6),
+        })
+    totals = {
+        key: sum(item[key] for item in usage)
+        for key in ("fallbacks", "prompt_tokens", "completion_tokens", "cost_usd")
+    }
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    # Calls are counted once even when a multi-article call spans several categories
+    counts = crud.get_generation_totals(db, since)
+    totals.update(calls=counts["calls"], parse_failures=counts["parse_failures"])
+    totals["parse_failure_rate"] = round(counts["parse_failures"] / counts["calls"], 4) if counts["calls"] else 0.0
+    totals["fallback_rate"] = round(totals["fallbacks"] / counts["articles"], 4) if counts["articles"] else 0.0
+    return {"days": days, "totals": totals, "usage": usage}
+
+@app.get("/api/admin/profiles")
+def list_profiles(current_user: models.User = Depends(auth.require_admin)):
+    """Recently captured request profiles, newest first (Admin only)"""
+    return [profile.to_dict() for profile in reversed(profiling.profiles)]
+
+@app.get("/api/admin/profiles/{profile_id}")
+def get_profile(profile_id: int, current_user: models.User = Depends(auth.require_admin)):
+    """One request profile with its stack samples and SQL statements (Admin only)"""
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.to_dict(detail=True)
+
 # Authentication endpoints
 @app.post("/api/auth/register", response_model=schemas.User)
 def register(
@@ -211,7 +525,7 @@ async def list_users(
 
 # About page endpoints
 @app.get("/api/about")
-def get_about(db: Session = Depends(get_db)):
+def get_about(db: Session = Depends(get_read_db)):
     """Get about page content"""
     about = crud.get_about_content(db)
     if not about:
@@ -236,11 +550,37 @@ def update_about(
         "updated_by": about.updated_by
     }
 
+# Feature list pagination (next page cursor is returned in the X-Next-Cursor header)
+MAX_FEATURE_PAGE_SIZE = 500
+
+@dataclass
+class FeaturePageParams:
+    """Query parameters shared by every feature list endpoint"""
+    limit: int = Query(100, ge=1, le=MAX_FEATURE_PAGE_SIZE)
+    cursor: Optional[str] = None
+    q: Optional[str] = Query(None, min_length=1, max_length=200)
+    match: str = Query("prefix", pattern="^(prefix|contains)$")
+
+def _feature_page(db: Session, model, response: Response, page: FeaturePageParams):
+    try:
+        features, next_cursor = crud.get_features_page(
+            db, model, limit=page.limit, cursor=page.cursor, q=page.q, match=page.match
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return features
+
 # Feature endpoints - Characters
 @app.get("/api/features/characters", response_model=List[schemas.Feature])
-def get_characters(db: Session = Depends(get_db)):
-    """Get all characters"""
-    return crud.get_all_features(db, models.Character)
+def get_characters(
+    response: Response,
+    page: FeaturePageParams = Depends(),
+    db: Session = Depends(get_read_db)
+):
+    """Get characters, paginated and optionally filtered by name"""
+    return _feature_page(db, models.Character, response, page)
 
 @app.post("/api/features/characters", response_model=schemas.Feature)
 def create_character(
@@ -278,9 +618,13 @@ def delete_character(
 
 # Feature endpoints - Places
 @app.get("/api/features/places", response_model=List[schemas.Feature])
-def get_places(db: Session = Depends(get_db)):
-    """Get all places"""
-    return crud.get_all_features(db, models.Place)
+def get_places(
+    response: Response,
+    page: FeaturePageParams = Depends(),
+    db: Session = Depends(get_read_db)
+):
+    """Get places, paginated and optionally filtered by name"""
+    return _feature_page(db, models.Place, response, page)
 
 @app.post("/api/features/places", response_model=schemas.Feature)
 def create_place(
@@ -318,9 +662,13 @@ def delete_place(
 
 # Feature endpoints - Weather
 @app.get("/api/features/weather", response_model=List[schemas.Feature])
-def get_weather(db: Session = Depends(get_db)):
-    """Get all weather conditions"""
-    return crud.get_all_features(db, models.Weather)
+def get_weather(
+    response: Response,
+    page: FeaturePageParams = Depends(),
+    db: Session = Depends(get_read_db)
+):
+    """Get weather conditions, paginated and optionally filtered by name"""
+    return _feature_page(db, models.Weather, response, page)
 
 @app.post("/api/features/weather", response_model=schemas.Feature)
 def create_weather(
@@ -358,9 +706,13 @@ def delete_weather(
 
 # Feature endpoints - Events
 @app.get("/api/features/events", response_model=List[schemas.Feature])
-def get_events(db: Session = Depends(get_db)):
-    """Get all events"""
-    return crud.get_all_features(db, models.Event)
+def get_events(
+    response: Response,
+    page: FeaturePageParams = Depends(),
+    db: Session = Depends(get_read_db)
+):
+    """Get events, paginated and optionally filtered by name"""
+    return _feature_page(db, models.Event, response, page)
 
 @app.post("/api/features/events", response_model=schemas.Feature)
 def create_event(
@@ -395,3 +747,59 @@ def delete_event(
     if not success:
         raise HTTPException(status_code=404, detail="Event not found")
     return {"message": "Event deleted successfully"}
+
+
+# Bulk feature upsert
+MAX_BULK_FEATURES = 50000
+
+def _parse_bulk_body(body: bytes, content_type: str):
+    """Decode a JSON array or NDJSON (one object per line) request body"""
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    return items
+
+@app.post("/api/features/{feature_type}/bulk", response_model=schemas.FeatureBulkResult)
+async def bulk_upsert_features(
+    feature_type: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_author_or_admin)
+):
+    """Create or update many features by name from a JSON array or NDJSON body (Admin/Author only)"""
+    model = models.FEATURE_MODELS.get(feature_type)
+    if model is None:
+        raise HTTPException(status_code=404, detail=f"Unknown feature type: {feature_type}")
+    
+    raw_items = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    if len(raw_items) > MAX_BULK_FEATURES:
+        raise HTTPException(status_code=413, detail=f"Too many items (max {MAX_BULK_FEATURES})")
+    
+    # Invalid items are reported as skipped; valid ones go to the database
+    results = [None] * len(raw_items)
+    valid, positions = [], []
+    for index, raw in enumerate(raw_items):
+        try:
+            feature = schemas.FeatureCreate.model_validate(raw)
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "skipped",
+                              "detail": f"invalid: {e.errors()[0]['msg']}"}
+            continue
+        valid.append(feature.model_dump())
+        positions.append(index)
+    
+    written = await run_in_threadpool(
+        crud.bulk_upsert_features, db, model, valid, current_user.username,
+        settings.feature_bulk_chunk_size
+    )
+    for position, result in zip(positions, written):
+        results[position] = dict(result, index=position)
+    
+    counts = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("created", "updated", "skipped")}
+    return {**counts, "items": results}
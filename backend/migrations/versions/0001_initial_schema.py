@@ -0,0 +1,86 @@
+"""Initial schema
+
+Matches the tables previously created by Base.metadata.create_all. Tables
+that already exist are left untouched, so databases created before
+migrations were introduced can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+FEATURE_TABLES = ["characters", "places", "weather", "events"]
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+def upgrade():
+    if not _has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(100), nullable=False),
+            sa.Column("email", sa.String(200), nullable=False),
+            sa.Column("hashed_password", sa.String(255), nullable=False),
+            sa.Column("full_name", sa.String(200), nullable=True),
+            sa.Column("role", sa.Enum("ADMIN", "AUTHOR", "VIEWER", name="userrole"), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if not _has_table("news_articles"):
+        op.create_table(
+            "news_articles",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(500), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("category", sa.String(100), nullable=False),
+            sa.Column("author", sa.String(200), nullable=True),
+            sa.Column("location", sa.String(200), nullable=True),
+            sa.Column("image_url", sa.String(500), nullable=True),
+            sa.Column("published_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("is_featured", sa.Boolean(), nullable=True),
+            sa.Column("views", sa.Integer(), nullable=True),
+        )
+        op.create_index("ix_news_articles_id", "news_articles", ["id"])
+
+    if not _has_table("about_content"):
+        op.create_table(
+            "about_content",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_by", sa.String(100), nullable=True),
+        )
+        op.create_index("ix_about_content_id", "about_content", ["id"])
+
+    for table in FEATURE_TABLES:
+        if _has_table(table):
+            continue
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(200), nullable=False, unique=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("created_by", sa.String(100), nullable=True),
+        )
+        op.create_index(f"ix_{table}_id", table, ["id"])
+
+def downgrade():
+    for table in FEATURE_TABLES:
+        op.drop_table(table)
+    op.drop_table("about_content")
+    op.drop_table("news_articles")
+    op.drop_table("users")
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
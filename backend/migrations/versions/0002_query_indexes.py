@@ -0,0 +1,45 @@
+"""Indexes for the hot queries in crud.py
+
+- news listing:   ORDER BY published_date DESC
+- category pages: WHERE category = ? ORDER BY published_date DESC
+- featured news:  WHERE is_featured ORDER BY published_date DESC (partial)
+- feature lists:  ORDER BY created_at DESC
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+FEATURE_TABLES = ["characters", "places", "weather", "events"]
+
+def upgrade():
+    op.create_index(
+        "ix_news_articles_published_date", "news_articles", ["published_date"],
+        if_not_exists=True
+    )
+    op.create_index(
+        "ix_news_articles_category_published_date", "news_articles", ["category", "published_date"],
+        if_not_exists=True
+    )
+    op.create_index(
+        "ix_news_articles_featured_published_date", "news_articles", ["published_date"],
+        postgresql_where=sa.text("is_featured"),
+        sqlite_where=sa.text("is_featured = 1"),
+        if_not_exists=True
+    )
+    for table in FEATURE_TABLES:
+        op.create_index(f"ix_{table}_created_at", table, ["created_at"], if_not_exists=True)
+
+def downgrade():
+    for table in FEATURE_TABLES:
+        op.drop_index(f"ix_{table}_created_at", table_name=table)
+    op.drop_index("ix_news_articles_featured_published_date", table_name="news_articles")
+    op.drop_index("ix_news_articles_category_published_date", table_name="news_articles")
+    op.drop_index("ix_news_articles_published_date", table_name="news_articles")
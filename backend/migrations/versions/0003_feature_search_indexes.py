@@ -0,0 +1,71 @@
+"""Name search indexes for the feature tables
+
+- feature lists now page newest-first by id (ids follow creation order), so
+  the created_at index from 0002 is no longer used and is dropped
+- lower(name), id backs prefix search; on Postgres it uses COLLATE "C" so the
+  same btree serves both the prefix range and the ORDER BY (the equivalent of
+  text_pattern_ops, but usable for ordering too)
+- substring search: pg_trgm GIN index on Postgres, FTS5 trigram table kept in
+  sync by triggers on SQLite
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+FEATURE_TABLES = ["characters", "places", "weather", "events"]
+
+def _sqlite_fts_statements(table):
+    fts = f"{table}_name_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"name, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name); "
+        f"INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for table in FEATURE_TABLES:
+        op.drop_index(f"ix_{table}_created_at", table_name=table, if_exists=True)
+        if dialect == "postgresql":
+            op.execute(
+                f'CREATE INDEX IF NOT EXISTS ix_{table}_name_lower ON {table} (lower(name) COLLATE "C", id)'
+            )
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_name_trgm ON {table} USING gin (lower(name) gin_trgm_ops)"
+            )
+        else:
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_name_lower ON {table} (lower(name), id)")
+            if dialect == "sqlite":
+                for statement in _sqlite_fts_statements(table):
+                    op.execute(statement)
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in FEATURE_TABLES:
+        if dialect == "sqlite":
+            fts = f"{table}_name_fts"
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        if dialect == "postgresql":
+            op.drop_index(f"ix_{table}_name_trgm", table_name=table, if_exists=True)
+        op.drop_index(f"ix_{table}_name_lower", table_name=table, if_exists=True)
+        op.create_index(f"ix_{table}_created_at", table, ["created_at"])
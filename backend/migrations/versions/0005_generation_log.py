@@ -0,0 +1,36 @@
+"""LLM usage log, one row per generation call
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "generation_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("source", sa.String(50), nullable=False),
+        sa.Column("provider", sa.String(50), nullable=False),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("category", sa.String(100), nullable=True),
+        sa.Column("prompt_chars", sa.Integer(), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+        sa.Column("completion_tokens", sa.Integer(), nullable=True),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.Column("fell_back", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("article_id", sa.Integer(), sa.ForeignKey("news_articles.id", ondelete="SET NULL"), nullable=True),
+    )
+    op.create_index("ix_generation_log_id", "generation_log", ["id"])
+    op.create_index("ix_generation_log_created_at", "generation_log", ["created_at"])
+
+def downgrade():
+    op.drop_table("generation_log")
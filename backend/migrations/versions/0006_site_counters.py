@@ -0,0 +1,33 @@
+"""Incrementally maintained site counters, seeded from news_articles
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "site_counters",
+        sa.Column("name", sa.String(200), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO site_counters (name, value) SELECT 'articles', COUNT(*) FROM news_articles")
+    op.execute(
+        "INSERT INTO site_counters (name, value) "
+        "SELECT 'articles:featured', COUNT(*) FROM news_articles WHERE is_featured"
+    )
+    op.execute("INSERT INTO site_counters (name, value) SELECT 'views', COALESCE(SUM(views), 0) FROM news_articles")
+    op.execute(
+        "INSERT INTO site_counters (name, value) "
+        "SELECT 'articles:category:' || category, COUNT(*) FROM news_articles GROUP BY category"
+    )
+
+def downgrade():
+    op.drop_table("site_counters")
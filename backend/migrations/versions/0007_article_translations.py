@@ -0,0 +1,31 @@
+"""Per-locale article translations
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "article_translations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("article_id", sa.Integer(), sa.ForeignKey("news_articles.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("locale", sa.String(16), nullable=False),
+        sa.Column("title", sa.String(500), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("article_id", "locale", name="uq_article_translations_article_locale"),
+    )
+    op.create_index("ix_article_translations_id", "article_translations", ["id"])
+    # Lookups by (locale, article ids) on reads, anti-join by locale when finding untranslated articles
+    op.create_index("ix_article_translations_locale_article", "article_translations", ["locale", "article_id"])
+
+def downgrade():
+    op.drop_table("article_translations")
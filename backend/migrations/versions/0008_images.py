@@ -0,0 +1,55 @@
+"""Content-addressed images with resized variants
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "images",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=False, unique=True),
+        sa.Column("format", sa.String(10), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("bytes", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(200), nullable=False),
+        sa.Column("source_url", sa.String(1000), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_images_id", "images", ["id"])
+    op.create_table(
+        "image_variants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("image_id", sa.Integer(), sa.ForeignKey("images.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("format", sa.String(10), nullable=False),
+        sa.Column("bytes", sa.Integer(), nullable=False),
+        sa.Column("path", sa.String(200), nullable=False),
+        sa.UniqueConstraint("image_id", "width", "format", name="uq_image_variants_image_width_format"),
+    )
+    op.create_index("ix_image_variants_id", "image_variants", ["id"])
+    # SQLite cannot add a constraint without rebuilding news_articles (and it
+    # does not enforce foreign keys here anyway), so it gets the bare column
+    if op.get_bind().dialect.name == "sqlite":
+        op.add_column("news_articles", sa.Column("image_id", sa.Integer(), nullable=True))
+    else:
+        op.add_column(
+            "news_articles",
+            sa.Column("image_id", sa.Integer(), sa.ForeignKey("images.id", ondelete="SET NULL"), nullable=True)
+        )
+
+def downgrade():
+    with op.batch_alter_table("news_articles") as batch:
+        batch.drop_column("image_id")
+    op.drop_table("image_variants")
+    op.drop_table("images")
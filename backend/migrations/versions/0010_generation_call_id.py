@@ -0,0 +1,19 @@
+"""Group generation_log rows that came from one multi-article LLM call
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("generation_log", sa.Column("call_id", sa.String(32), nullable=True))
+
+def downgrade():
+    op.drop_column("generation_log", "call_id")
@@ -0,0 +1,22 @@
+"""Flag generation_log calls whose answer could not be parsed
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column(
+        "generation_log",
+        sa.Column("parse_failed", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+def downgrade():
+    op.drop_column("generation_log", "parse_failed")
@@ -0,0 +1,35 @@
+"""Planned generation slots for the spread-out daily schedule
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "generation_slots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("slot", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(100), nullable=False),
+        sa.Column("include_billionaire", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("article_id", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.UniqueConstraint("day", "slot", name="uq_generation_slots_day_slot"),
+    )
+    op.create_index("ix_generation_slots_status_due_at", "generation_slots", ["status", "due_at"])
+
+def downgrade():
+    op.drop_table("generation_slots")
@@ -0,0 +1,19 @@
+"""Store the headers of idempotent responses so replays carry them
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("idempotency_keys", sa.Column("response_headers", sa.Text(), nullable=True))
+
+def downgrade():
+    op.drop_column("idempotency_keys", "response_headers")
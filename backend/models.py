@@ -1,8 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, Boolean, Enum, Float, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from config import get_settings
 import enum
 
+def _feature_indexes(table: str):
+    """Name search index shared by the feature tables (see migration 0003).
+    
+    On Postgres it is built on lower(name) COLLATE "C" and a pg_trgm GIN index
+    backs substring search; SQLite gets an FTS5 trigram table instead.
+    """
+    return (
+        Index(f"ix_{table}_name_lower", func.lower(text("name")), "id"),
+    )
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     AUTHOR = "author"
@@ -36,10 +48,94 @@ class NewsArticle(Base):
     published_date = Column(DateTime(timezone=True), server_default=func.now())
     is_featured = Column(Boolean, default=False)
     views = Column(Integer, default=0)
+    image_id = Column(Integer, ForeignKey("images.id", ondelete="SET NULL"), nullable=True)
+    
+    # Loaded with one extra query per result list, so listings stay free of N+1
+    image = relationship("Image", lazy="selectin")
+    
+    # Indexes for the hot listing queries in crud.py (see migration 0002). On
+    # Postgres the table can be partitioned by month on published_date, which
+    # makes the primary key (id, published_date) (see partitions.py)
+    __table_args__ = (
+        Index("ix_news_articles_published_date", "published_date"),
+        Index("ix_news_articles_category_published_date", "category", "published_date"),
+        Index(
+            "ix_news_articles_featured_published_date", "published_date",
+            postgresql_where=text("is_featured"),
+            sqlite_where=text("is_featured = 1")
+        ),
+    )
     
     def __repr__(self):
         return f"<NewsArticle {self.title}>"
 
+class ArticleTranslation(Base):
+    """An article's title and content in another locale (filled in by translations.py)"""
+    __tablename__ = "article_translations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    article_id = Column(Integer, ForeignKey("news_articles.id", ondelete="CASCADE"), nullable=False)
+    locale = Column(String(16), nullable=False)
+    title = Column(String(500), nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("article_id", "locale", name="uq_article_translations_article_locale"),
+        Index("ix_article_translations_locale_article", "locale", "article_id"),
+    )
+    
+    def __repr__(self):
+        return f"<ArticleTranslation {self.article_id}/{self.locale}>"
+
+class Image(Base):
+    """An ingested image, stored once per content hash (see images.py)"""
+    __tablename__ = "images"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True)
+    format = Column(String(10), nullable=False)  # format of the stored original
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    bytes = Column(Integer, nullable=False)
+    path = Column(String(200), nullable=False)  # relative to MEDIA_DIR
+    source_url = Column(String(1000), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    variants = relationship(
+        "ImageVariant", lazy="selectin", order_by="[ImageVariant.width, ImageVariant.format]",
+        cascade="all, delete-orphan"
+    )
+    
+    @property
+    def url(self):
+        return f"{get_settings().media_url_prefix}/{self.path}"
+    
+    def __repr__(self):
+        return f"<Image {self.sha256[:12]} {self.width}x{self.height}>"
+
+class ImageVariant(Base):
+    __tablename__ = "image_variants"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(Integer, ForeignKey("images.id", ondelete="CASCADE"), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    format = Column(String(10), nullable=False)  # "webp" or "jpeg"
+    bytes = Column(Integer, nullable=False)
+    path = Column(String(200), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("image_id", "width", "format", name="uq_image_variants_image_width_format"),
+    )
+    
+    @property
+    def url(self):
+        return f"{get_settings().media_url_prefix}/{self.path}"
+    
+    def __repr__(self):
+        return f"<ImageVariant {self.image_id} {self.width}w {self.format}>"
+
 class AboutContent(Base):
     __tablename__ = "about_content"
     
@@ -60,6 +156,8 @@ class Character(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(String(100), nullable=True)
     
+    __table_args__ = _feature_indexes("characters")
+    
     def __repr__(self):
         return f"<Character {self.name}>"
 
@@ -72,6 +170,8 @@ class Place(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(String(100), nullable=True)
     
+    __table_args__ = _feature_indexes("places")
+    
     def __repr__(self):
         return f"<Place {self.name}>"
 
@@ -84,6 +184,8 @@ class Weather(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(String(100), nullable=True)
     
+    __table_args__ = _feature_indexes("weather")
+    
     def __repr__(self):
         return f"<Weather {self.name}>"
 
@@ -96,5 +198,102 @@ class Event(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(String(100), nullable=True)
     
+    __table_args__ = _feature_indexes("events")
+    
     def __repr__(self):
         return f"<Event {self.name}>"
+
+class GenerationLog(Base):
+    __tablename__ = "generation_log"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    source = Column(String(50), nullable=False)  # "api" or "scheduler"
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    category = Column(String(100), nullable=True)
+    prompt_chars = Column(Integer, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=True)
+    fell_back = Column(Boolean, default=False, nullable=False)
+    parse_failed = Column(Boolean, default=False, nullable=False)  # answer was not in the requested format
+    error = Column(Text, nullable=True)
+    article_id = Column(Integer, ForeignKey("news_articles.id", ondelete="SET NULL"), nullable=True)
+    # Shared by the rows of one multi-article call, whose tokens are split across them
+    call_id = Column(String(32), nullable=True)
+    
+    def __repr__(self):
+        return f"<GenerationLog {self.provider}/{self.model} article={self.article_id}>"
+
+class GenerationSlot(Base):
+    """One planned article of a day's quota in the "spread" schedule (see generation_slots.py)"""
+    __tablename__ = "generation_slots"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)  # local day the slot belongs to
+    slot = Column(Integer, nullable=False)  # position in the day's plan
+    category = Column(String(100), nullable=False)
+    include_billionaire = Column(Boolean, default=False, nullable=False)
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # "pending", "running" or "done"
+    attempts = Column(Integer, nullable=False, default=0)  # failed generation attempts
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    # No foreign key: a partitioned news_articles can't be referenced (see partitions.py)
+    article_id = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    __table_args__ = (
+        UniqueConstraint("day", "slot", name="uq_generation_slots_day_slot"),
+        Index("ix_generation_slots_status_due_at", "status", "due_at"),
+    )
+    
+    def __repr__(self):
+        return f"<GenerationSlot {self.day} #{self.slot} {self.category} {self.status}>"
+
+class SiteCounter(Base):
+    """Running totals kept in step with news_articles by crud (see repair_counters.py)"""
+    __tablename__ = "site_counters"
+    
+    name = Column(String(200), primary_key=True)  # e.g. "articles", "articles:category:Sports"
+    value = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<SiteCounter {self.name}={self.value}>"
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String(200), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix time of the last refill
+    
+    def __repr__(self):
+        return f"<RateLimitBucket {self.key}={self.tokens:.2f}>"
+
+class IdempotencyKey(Base):
+    """Outcome of a request sent with an Idempotency-Key header (see idempotency.py)"""
+    __tablename__ = "idempotency_keys"
+    
+    scope = Column(String(300), primary_key=True)  # "<method> <path> <user or ip>"
+    key = Column(String(200), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False)  # "in_progress" or "completed"
+    response_status = Column(Integer, nullable=True)
+    response_content_type = Column(String(100), nullable=True)
+    response_body = Column(Text, nullable=True)
+    response_headers = Column(Text, nullable=True)  # JSON [[name, value], ...]
+    created_at = Column(Float, nullable=False, index=True)  # unix time, for expiry
+    updated_at = Column(Float, nullable=False)  # unix time the owner last claimed it
+    
+    def __repr__(self):
+        return f"<IdempotencyKey {self.key} {self.status}>"
+
+# Feature tables by their URL name, used by the generic feature endpoints
+FEATURE_MODELS = {
+    "characters": Character,
+    "places": Place,
+    "weather": Weather,
+    "events": Event,
+}
@@ -0,0 +1,313 @@
+"""
+Monthly range partitioning of news_articles on published_date (PostgreSQL only).
+
+    python partitions.py convert    # one-off online conversion of the existing table
+    python partitions.py maintain   # create upcoming months, archive old ones (also a daily job)
+
+Partitions are named news_articles_pYYYY_MM, with news_articles_default as a
+safety net for rows outside every month. Months older than ARCHIVE_AFTER_MONTHS
+are archived: moved to ARCHIVE_TABLESPACE (when set) and frozen. They stay
+attached, so every crud query still sees them, while recent-first reads only
+touch the newest partitions (see crud.get_news_articles).
+
+Postgres cannot point a foreign key at a partitioned table without the
+partition key, so the conversion drops the generation_log and
+article_translations foreign keys; crud.delete_news_article cleans those up.
+"""
+from datetime import date, datetime, timezone
+import argparse
+import logging
+import re
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from config import get_settings
+from database import SessionLocal, engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARENT = "news_articles"
+DEFAULT_PARTITION = "news_articles_default"
+SHADOW_TABLE = "news_articles_partitioned"
+OLD_TABLE = "news_articles_unpartitioned"
+ARCHIVED_COMMENT = "archived"
+PARTITION_NAME = re.compile(r"^news_articles_p(\d{4})_(\d{2})$")
+
+# Indexes of the partitioned table (the models' indexes; the primary key covers id lookups)
+INDEXES = {
+    "ix_news_articles_id": "(id)",
+    "ix_news_articles_published_date": "(published_date)",
+    "ix_news_articles_category_published_date": "(category, published_date)",
+    "ix_news_articles_featured_published_date": "(published_date) WHERE is_featured",
+}
+
+def _month_start(day) -> date:
+    return date(day.year, day.month, 1)
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _utc(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y_%m}"
+
+def is_partitioned(db, table: str = PARENT) -> bool:
+    return db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    ).scalar()
+
+def list_partitions(db, parent: str = PARENT):
+    """[(name, comment, tablespace)] of the partitions attached to parent"""
+    return db.execute(text("""
+        SELECT c.relname, obj_description(c.oid, 'pg_class'), ts.spcname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        LEFT JOIN pg_tablespace ts ON ts.oid = c.reltablespace
+        WHERE i.inhparent = to_regclass(:parent)
+        ORDER BY c.relname
+    """), {"parent": parent}).all()
+
+def create_month_partition(db, month: date, parent: str = PARENT):
+    """Create and attach one month; rows already in the default partition move into it"""
+    name = partition_name(month)
+    start, end = _utc(month), _utc(_add_months(month, 1))
+    # CREATE + ATTACH only takes a SHARE UPDATE EXCLUSIVE lock on the parent,
+    # unlike CREATE TABLE ... PARTITION OF, so reads and writes carry on
+    db.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    if any(row[0] == DEFAULT_PARTITION for row in list_partitions(db, parent)):
+        db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE published_date >= :start AND published_date < :end
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), {"start": start, "end": end})
+    db.execute(text(
+        f"ALTER TABLE {parent} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    db.commit()
+    logger.info(f"Created partition {name}")
+
+def ensure_partitions(db, parent: str = PARENT, start: date = None, months_ahead: int = None) -> list:
+    """Make sure every month from start (default: this month) to months_ahead from now exists"""
+    months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    this_month = _month_start(datetime.now(timezone.utc))
+    month = _month_start(start) if start else this_month
+    existing = {row[0] for row in list_partitions(db, parent)}
+    created = []
+    if DEFAULT_PARTITION not in existing:
+        db.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {parent} DEFAULT"))
+        db.commit()
+    while month <= _add_months(this_month, months_ahead):
+        if partition_name(month) not in existing:
+            create_month_partition(db, month, parent)
+            created.append(partition_name(month))
+        month = _add_months(month, 1)
+    return created
+
+def archive_partitions(db, older_than_months: int = None) -> list:
+    """Move whole months older than the cutoff to the archive tier"""
+    older_than_months = settings.archive_after_months if older_than_months is None else older_than_months
+    cutoff = _add_months(_month_start(datetime.now(timezone.utc)), -older_than_months)
+    tablespace = settings.archive_tablespace
+    archived = []
+    for name, comment, current_tablespace in list_partitions(db):
+        match = PARTITION_NAME.match(name)
+        if not match or comment == ARCHIVED_COMMENT:
+            continue
+        if date(int(match.group(1)), int(match.group(2)), 1) >= cutoff:
+            continue
+        if tablespace and current_tablespace != tablespace:
+            db.execute(text(f'ALTER TABLE {name} SET TABLESPACE "{tablespace}"'))
+            for (index,) in db.execute(text(
+                "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = to_regclass(:name)"
+            ), {"name": name}):
+                db.execute(text(f'ALTER INDEX {index} SET TABLESPACE "{tablespace}"'))
+        db.execute(text(f"COMMENT ON TABLE {name} IS '{ARCHIVED_COMMENT}'"))
+        db.commit()
+        # Frozen rows never need another anti-wraparound rewrite (VACUUM cannot run in a transaction)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"VACUUM (FREEZE, ANALYZE) {name}"))
+        archived.append(name)
+        logger.info(f"Archived partition {name}")
+    return archived
+
+def maintain(db) -> dict:
+    """Daily partition upkeep; a no-op unless news_articles is partitioned"""
+    if db.get_bind().dialect.name != "postgresql" or not is_partitioned(db):
+        return {"created": [], "archived": []}
+    return {"created": ensure_partitions(db), "archived": archive_partitions(db)}
+
+# How long the swap waits for the exclusive lock per attempt (queued behind a
+# long transaction it would block every other query meanwhile)
+SWAP_LOCK_TIMEOUT = "5s"
+SWAP_ATTEMPTS = 10
+
+def _table_checksum(db, table: str):
+    """(rows, checksum over every row, max id) of one table"""
+    return tuple(db.execute(text(
+        f"SELECT count(*), coalesce(sum(hashtext(t::text)::bigint), 0), max(t.id) FROM {table} t"
+    )).one())
+
+def _rows_after(db, table: str, after_id: int):
+    """(rows with id > after_id, max id): index lookups only"""
+    return tuple(db.execute(text(
+        f"SELECT count(*), max(id) FROM {table} WHERE id > :after"
+    ), {"after": after_id}).one())
+
+def convert(db, batch_size: int = 5000, drop_old: bool = False):
+    """Convert news_articles to a partitioned table while it keeps serving traffic.
+
+    A shadow partitioned table is filled in id-ordered batches while a trigger
+    mirrors concurrent writes into it. Both tables are compared row by row
+    before any lock is taken; the final swap only re-checks the rows added
+    since then (index lookups) and renames, under a short ACCESS EXCLUSIVE lock.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        raise SystemExit("Partitioning needs PostgreSQL")
+    if is_partitioned(db):
+        print("news_articles is already partitioned")
+        return
+    if db.execute(text(f"SELECT count(*) FROM {PARENT} WHERE published_date IS NULL")).scalar():
+        raise SystemExit("Set published_date on every article before partitioning")
+
+    # 1. Shadow table with the partitioned primary key, indexes and outgoing foreign keys
+    db.execute(text(f"""
+        CREATE TABLE {SHADOW_TABLE} (
+            LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            PRIMARY KEY (id, published_date)
+        ) PARTITION BY RANGE (published_date)
+    """))
+    for index, definition in INDEXES.items():
+        db.execute(text(f"CREATE INDEX {index}_new ON {SHADOW_TABLE} {definition}"))
+    for name, definition in db.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+    ), {"table": PARENT}).all():
+        # Constraint names are per table, so the final name can be used right away
+        db.execute(text(f"ALTER TABLE {SHADOW_TABLE} ADD CONSTRAINT {name} {definition}"))
+    db.commit()
+    first = db.execute(text(f"SELECT min(published_date) FROM {PARENT}")).scalar()
+    ensure_partitions(db, parent=SHADOW_TABLE, start=first)
+
+    # 2. Mirror writes made during the copy (an update re-inserts, so rows can change month)
+    db.execute(text(f"""
+        CREATE FUNCTION news_articles_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {SHADOW_TABLE} WHERE id = OLD.id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {SHADOW_TABLE} SELECT NEW.* ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+    """))
+    db.execute(text(
+        f"CREATE TRIGGER news_articles_mirror AFTER INSERT OR UPDATE OR DELETE ON {PARENT} "
+        "FOR EACH ROW EXECUTE FUNCTION news_articles_mirror()"
+    ))
+    db.commit()
+
+    # 3. Backfill in batches; FOR SHARE makes concurrent updates wait for the
+    #    batch to commit, so the trigger then sees (and replaces) the copied row
+    last_id, copied = 0, 0
+    while True:
+        upper = db.execute(text(
+            f"SELECT max(id) FROM (SELECT id FROM {PARENT} WHERE id > :last ORDER BY id LIMIT :n) batch"
+        ), {"last": last_id, "n": batch_size}).scalar()
+        if upper is None:
+            break
+        copied += db.execute(text(f"""
+            INSERT INTO {SHADOW_TABLE}
+            SELECT * FROM {PARENT} WHERE id > :last AND id <= :upper FOR SHARE
+            ON CONFLICT DO NOTHING
+        """), {"last": last_id, "upper": upper}).rowcount
+        db.commit()
+        last_id = upper
+        print(f"copied up to id {last_id} ({copied} rows)")
+
+    # 4. Verify without blocking anyone: the trigger writes the shadow row in the
+    #    same transaction as the original, so a single snapshot of both tables
+    #    must match exactly
+    db.commit()
+    db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+    old_rows, old_checksum, verified_id = _table_checksum(db, PARENT)
+    new_rows, new_checksum, _ = _table_checksum(db, SHADOW_TABLE)
+    db.commit()
+    if (old_rows, old_checksum) != (new_rows, new_checksum):
+        raise SystemExit(
+            f"Tables differ ({old_rows} vs {new_rows} rows, checksum {old_checksum} vs {new_checksum}); "
+            "the shadow table was left in place"
+        )
+    verified_id = verified_id or 0
+    print(f"verified {old_rows} rows up to id {verified_id}")
+
+    # 5. Swap under a short exclusive lock, re-checking only rows added since step 4
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            db.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+            db.execute(text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+            break
+        except OperationalError:
+            db.rollback()
+            if attempt == SWAP_ATTEMPTS:
+                raise SystemExit(f"Could not lock {PARENT} for the swap; the shadow table and trigger were left in place")
+            print(f"lock not granted within {SWAP_LOCK_TIMEOUT}, retrying ({attempt}/{SWAP_ATTEMPTS})")
+            time.sleep(1)
+    old_delta = _rows_after(db, PARENT, verified_id)
+    new_delta = _rows_after(db, SHADOW_TABLE, verified_id)
+    if old_delta != new_delta:
+        db.rollback()
+        raise SystemExit(
+            f"Rows added since verifying differ ({old_delta} vs {new_delta}); the shadow table was left in place"
+        )
+    db.execute(text(f"DROP TRIGGER news_articles_mirror ON {PARENT}"))
+    db.execute(text("DROP FUNCTION news_articles_mirror()"))
+    for name, table in db.execute(text(
+        "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+        "WHERE confrelid = to_regclass(:table) AND contype = 'f'"
+    ), {"table": PARENT}).all():
+        db.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {name}"))
+    for (index,) in db.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+    ), {"table": PARENT}).all():
+        db.execute(text(f"ALTER INDEX {index} RENAME TO {index}_old"))
+    db.execute(text(f"ALTER TABLE {PARENT} RENAME TO {OLD_TABLE}"))
+    db.execute(text(f"ALTER TABLE {SHADOW_TABLE} RENAME TO {PARENT}"))
+    db.execute(text(f"ALTER INDEX {SHADOW_TABLE}_pkey RENAME TO {PARENT}_pkey"))
+    for index in INDEXES:
+        db.execute(text(f"ALTER INDEX {index}_new RENAME TO {index}"))
+    # The id sequence must outlive the old table
+    db.execute(text(f"ALTER SEQUENCE {PARENT}_id_seq OWNED BY {PARENT}.id"))
+    db.commit()
+    print(f"✅ news_articles is partitioned by month ({old_rows} rows verified, {old_delta[0]} added since); the old table is {OLD_TABLE}")
+
+    if drop_old:
+        db.execute(text(f"DROP TABLE {OLD_TABLE}"))
+        db.commit()
+        print(f"Dropped {OLD_TABLE}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition news_articles by month")
+    parser.add_argument("command", choices=["convert", "maintain"])
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows copied per transaction (convert)")
+    parser.add_argument("--drop-old", action="store_true", help="drop the unpartitioned table after converting")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        if args.command == "convert":
+            convert(db, batch_size=args.batch_size, drop_old=args.drop_old)
+        else:
+            result = maintain(db)
+            print(f"created: {result['created'] or 'none'}; archived: {result['archived'] or 'none'}")
+    finally:
+        db.close()
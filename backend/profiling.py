@@ -0,0 +1,219 @@
+"""
+Opt-in request profiling.
+
+When PROFILING_ENABLED is set, a request is profiled if an admin sends the
+X-Profile header or it is picked by PROFILING_SAMPLE_RATE. A background
+thread samples the Python stacks of the threads running the request (the
+event loop plus the threadpool workers FastAPI hands its sync endpoints and
+dependencies to) while it runs, and every SQL
+statement it issues is recorded so repeated near-identical statements can
+be flagged as likely N+1 queries. Profiles are kept in memory and listed
+under /api/admin/profiles. With profiling disabled nothing is installed.
+"""
+import contextvars
+import functools
+import itertools
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import fastapi.dependencies.utils
+import fastapi.routing
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import get_settings
+
+settings = get_settings()
+
+PROFILE_HEADER = "x-profile"
+
+# Leaf frames from these modules mean a thread is idle, not doing work
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+_profile_ids = itertools.count(1)
+profiles = deque(maxlen=50)
+# False if FastAPI's threadpool calls couldn't be hooked; samples then cover every busy thread
+_threads_tracked = False
+
+class RequestProfile:
+    def __init__(self, request: Request, reason: str):
+        self.id = next(_profile_ids)
+        self.method = request.method
+        self.path = request.url.path
+        self.reason = reason
+        self.started_at = time.time()
+        self.duration_ms = None
+        self.status_code = None
+        self.stacks = Counter()
+        self.samples = 0
+        self.threads = set()  # idents of the threads currently running this request
+        self.queries = []  # (normalized sql, duration ms)
+    
+    def record_query(self, statement: str, duration_ms: float):
+        self.queries.append((normalize_sql(statement), duration_ms))
+    
+    def query_summary(self):
+        totals = {}
+        for sql, duration_ms in self.queries:
+            count, total = totals.get(sql, (0, 0.0))
+            totals[sql] = (count + 1, total + duration_ms)
+        return sorted(
+            ({"sql": sql, "count": count, "total_ms": round(total, 2)} for sql, (count, total) in totals.items()),
+            key=lambda q: q["total_ms"], reverse=True
+        )
+    
+    def to_dict(self, detail: bool = False):
+        queries = self.query_summary()
+        data = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            # "process": stacks include other requests' threads, not just this one
+            "scope": "request" if _threads_tracked else "process",
+            "query_count": len(self.queries),
+            "n_plus_one": [q for q in queries if q["count"] >= settings.profiling_n_plus_one_threshold],
+        }
+        if detail:
+            data["queries"] = queries
+            # Collapsed-stack format, loadable by flamegraph.pl or speedscope
+            data["stacks"] = [f"{stack} {count}" for stack, count in self.stacks.most_common(200)]
+        return data
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and expanded IN lists so similar statements compare equal"""
+    sql = " ".join(statement.split())
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    sql = re.sub(r"%\(\w+\)s|:\w+|\$\d+", "?", sql)
+    return re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of the profile's busy threads (all busy threads if untracked) until stopped"""
+    
+    def __init__(self, profile: RequestProfile, interval: float):
+        super().__init__(daemon=True)
+        self.profile = profile
+        self.interval = interval
+        self._stopped = threading.Event()
+    
+    def run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            threads = set(self.profile.threads)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                if _threads_tracked and thread_id not in threads:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.profile.stacks[";".join(reversed(stack))] += 1
+            self.profile.samples += 1
+    
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+def _run_tracked(profile: RequestProfile, func):
+    thread_id = threading.get_ident()
+    profile.threads.add(thread_id)
+    try:
+        return func()
+    finally:
+        profile.threads.discard(thread_id)
+
+async def _profiled_threadpool(func, *args, **kwargs):
+    """FastAPI's run_in_threadpool, registering the worker thread with the current profile"""
+    profile = _current_profile.get()
+    call = functools.partial(func, *args, **kwargs)
+    if profile is None:
+        return await run_in_threadpool(call)
+    return await run_in_threadpool(_run_tracked, profile, call)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is not None and starts:
+        profile.record_query(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+def _is_admin_token(authorization: str) -> bool:
+    """Whether the bearer token belongs to an active admin (one query, only when asked to profile)"""
+    if not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        payload = jwt.decode(authorization[7:], settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        return False
+    from auth import get_user_by_username
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        user = get_user_by_username(db, payload.get("sub"))
+        return bool(user and user.is_active and user.role.value == "admin")
+    finally:
+        db.close()
+
+async def profile_requests(request: Request, call_next):
+    """Middleware: profile admin-requested or sampled requests"""
+    reason = None
+    if PROFILE_HEADER in request.headers:
+        if await run_in_threadpool(_is_admin_token, request.headers.get("authorization", "")):
+            reason = "header"
+    elif settings.profiling_sample_rate and random.random() < settings.profiling_sample_rate:
+        reason = "sampled"
+    if reason is None:
+        return await call_next(request)
+    
+    profile = RequestProfile(request, reason)
+    # Async endpoints and middleware run on the event loop thread
+    profile.threads.add(threading.get_ident())
+    token = _current_profile.set(profile)
+    sampler = StackSampler(profile, settings.profiling_interval_ms / 1000)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        profile.status_code = response.status_code
+    finally:
+        sampler.stop()
+        profile.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        _current_profile.reset(token)
+        profiles.append(profile)
+    response.headers["X-Profile-Id"] = str(profile.id)
+    return response
+
+def install(app):
+    """Register the middleware and SQL hooks; call only when profiling is enabled"""
+    global _threads_tracked
+    modules = (fastapi.routing, fastapi.dependencies.utils)
+    if all(getattr(module, "run_in_threadpool", None) is run_in_threadpool for module in modules):
+        for module in modules:
+            module.run_in_threadpool = _profiled_threadpool
+        _threads_tracked = True
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.middleware("http")(profile_requests)
+
+def get_profile(profile_id: int):
+    return next((p for p in profiles if p.id == profile_id), None)
@@ -0,0 +1,266 @@
+"""
+Token-bucket rate limiting for expensive endpoints.
+
+Each rule covers one route and owns one or more buckets keyed by scope:
+"user" (JWT subject, falling back to the client IP), "ip" or "global".
+A request is let through only if every bucket it maps to has a token.
+
+The client IP is the peer address unless the peer is one of TRUSTED_PROXIES,
+in which case it comes from the X-Forwarded-For chain (or X-Real-IP) the proxy
+set. Buckets that have refilled completely carry no state and are purged.
+"""
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from jose import JWTError, jwt
+from sqlalchemy.orm import Session
+
+from config import get_settings
+import models
+
+settings = get_settings()
+
+TRUSTED_PROXIES = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.trusted_proxy_list]
+
+def _is_trusted_proxy(address: Optional[str]) -> bool:
+    try:
+        ip = ipaddress.ip_address((address or "").strip())
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+@dataclass
+class Bucket:
+    """Token-bucket parameters: burst size and steady refill rate"""
+    scope: str  # "user", "ip" or "global"
+    capacity: float
+    refill_per_second: float
+
+@dataclass
+class RateLimitRule:
+    """Buckets shared by one or more routes"""
+    name: str
+    method: str
+    paths: List[str]
+    buckets: List[Bucket]
+    allowed: int = field(default=0, compare=False)
+    rejected: int = field(default=0, compare=False)
+
+def default_rules():
+    """Rules for the paid LLM call and the bcrypt-bound login endpoints"""
+    per_minute = 1 / 60
+    generate = [
+        Bucket("user", settings.rate_limit_generate_burst, settings.rate_limit_generate_per_minute * per_minute),
+        Bucket("global", settings.rate_limit_generate_burst * 5, settings.rate_limit_generate_per_minute * 5 * per_minute),
+    ]
+    login = [
+        Bucket("ip", settings.rate_limit_login_burst, settings.rate_limit_login_per_minute * per_minute),
+        Bucket("global", settings.rate_limit_login_burst * 10, settings.rate_limit_login_per_minute * 10 * per_minute),
+    ]
+    return [
+        RateLimitRule("generate", "POST", ["/api/news/generate"], generate),
+        RateLimitRule("login", "POST", ["/api/auth/login", "/api/auth/login/json"], login),
+    ]
+
+def _refill(tokens: float, updated_at: float, bucket: Bucket, now: float) -> float:
+    return min(bucket.capacity, tokens + (now - updated_at) * bucket.refill_per_second)
+
+def _wait_for_token(tokens: float, bucket: Bucket) -> float:
+    return (1 - tokens) / bucket.refill_per_second if bucket.refill_per_second > 0 else math.inf
+
+class MemoryBucketStore:
+    """Buckets in process memory - exact for a single worker.
+    
+    At most max_buckets are kept; past that the least recently used bucket is
+    dropped, which at worst hands a long-idle client a fresh burst.
+    """
+    
+    def __init__(self, max_buckets: int = None):
+        self.max_buckets = max_buckets or settings.rate_limit_max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def acquire(self, keyed_buckets: List[Tuple[str, Bucket]], now: float) -> float:
+        """Take one token from every bucket, or none; returns 0 or seconds to wait"""
+        with self._lock:
+            levels = []
+            for key, bucket in keyed_buckets:
+                tokens, updated_at = self._buckets.get(key, (bucket.capacity, now))
+                levels.append(_refill(tokens, updated_at, bucket, now))
+            wait = max((_wait_for_token(t, b) for t, (_, b) in zip(levels, keyed_buckets) if t < 1), default=0)
+            if wait:
+                return wait
+            for tokens, (key, _) in zip(levels, keyed_buckets):
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+            return 0
+    
+    def purge(self, before: float) -> int:
+        """Drop buckets untouched since before (full again by then)"""
+        with self._lock:
+            idle = [key for key, (_, updated_at) in self._buckets.items() if updated_at < before]
+            for key in idle:
+                del self._buckets[key]
+            return len(idle)
+    
+    def size(self) -> int:
+        return len(self._buckets)
+
+class DatabaseBucketStore:
+    """Buckets in the rate_limit_buckets table - shared by every worker"""
+    
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+    
+    def acquire(self, keyed_buckets: List[Tuple[str, Bucket]], now: float) -> float:
+        """Take one token from every bucket, or none; returns 0 or seconds to wait"""
+        import crud
+        db: Session = self.session_factory()
+        try:
+            keys = [key for key, _ in keyed_buckets]
+            rows = {
+                row.key: row for row in db.query(models.RateLimitBucket).filter(
+                    models.RateLimitBucket.key.in_(keys)
+                ).order_by(models.RateLimitBucket.key).with_for_update()
+            }
+            levels = []
+            for key, bucket in keyed_buckets:
+                row = rows.get(key)
+                tokens = _refill(row.tokens, row.updated_at, bucket, now) if row else bucket.capacity
+                levels.append(tokens)
+            wait = max((_wait_for_token(t, b) for t, (_, b) in zip(levels, keyed_buckets) if t < 1), default=0)
+            if wait:
+                db.rollback()
+                return wait
+            insert = crud.upsert_insert(db)
+            stmt = insert(models.RateLimitBucket).values([
+                {"key": key, "tokens": tokens - 1, "updated_at": now}
+                for tokens, (key, _) in zip(levels, keyed_buckets)
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[models.RateLimitBucket.key],
+                set_={"tokens": stmt.excluded.tokens, "updated_at": stmt.excluded.updated_at}
+            )
+            db.execute(stmt)
+            db.commit()
+            return 0
+        finally:
+            db.close()
+    
+    def purge(self, before: float) -> int:
+        """Delete buckets untouched since before (full again by then)"""
+        db: Session = self.session_factory()
+        try:
+            deleted = db.query(models.RateLimitBucket).filter(
+                models.RateLimitBucket.updated_at < before
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+    
+    def size(self) -> Optional[int]:
+        db: Session = self.session_factory()
+        try:
+            return db.query(models.RateLimitBucket).count()
+        finally:
+            db.close()
+
+class RateLimiter:
+    def __init__(self, store, rules: List[RateLimitRule]):
+        self.store = store
+        self.rules = rules
+        self._routes = {(rule.method, path): rule for rule in rules for path in rule.paths}
+    
+    def rule_for(self, method: str, path: str) -> Optional[RateLimitRule]:
+        return self._routes.get((method, path.rstrip("/") or "/"))
+    
+    @staticmethod
+    def client_ip(headers, client_host: Optional[str]) -> str:
+        """Peer address, or the client a trusted proxy forwarded for"""
+        if not _is_trusted_proxy(client_host):
+            return client_host or "unknown"
+        # The rightmost hop not added by one of our proxies is the client
+        for hop in reversed(headers.get("x-forwarded-for", "").split(",")):
+            hop = hop.strip()
+            if hop and not _is_trusted_proxy(hop):
+                return hop
+        return headers.get("x-real-ip") or client_host
+    
+    @staticmethod
+    def user_id(headers) -> Optional[str]:
+        """JWT subject from the Authorization header, without touching the database"""
+        authorization = headers.get("authorization", "")
+        if not authorization.lower().startswith("bearer "):
+            return None
+        try:
+            payload = jwt.decode(authorization[7:], settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+        except JWTError:
+            return None
+        return payload.get("sub")
+    
+    def keyed_buckets(self, rule: RateLimitRule, headers, client_host: Optional[str]):
+        ip = self.client_ip(headers, client_host)
+        keyed = []
+        for bucket in rule.buckets:
+            if bucket.scope == "global":
+                key = f"{rule.name}:global"
+            elif bucket.scope == "user":
+                user = self.user_id(headers)
+                key = f"{rule.name}:user:{user}" if user else f"{rule.name}:ip:{ip}"
+            else:
+                key = f"{rule.name}:ip:{ip}"
+            keyed.append((key, bucket))
+        return keyed
+    
+    def check(self, rule: RateLimitRule, headers, client_host: Optional[str]) -> float:
+        """0 if the request may proceed, else seconds until it may be retried"""
+        wait = self.store.acquire(self.keyed_buckets(rule, headers, client_host), time.time())
+        if wait:
+            rule.rejected += 1
+        else:
+            rule.allowed += 1
+        return wait
+    
+    def purge_idle(self, now: float = None) -> int:
+        """Forget buckets that have had time to refill completely"""
+        refill_seconds = max(
+            (b.capacity / b.refill_per_second for rule in self.rules for b in rule.buckets if b.refill_per_second > 0),
+            default=0
+        )
+        return self.store.purge((now or time.time()) - refill_seconds)
+    
+    def stats(self):
+        """Limiter state for the metrics endpoint"""
+        return {
+            "backend": type(self.store).__name__,
+            "buckets": self.store.size(),
+            "rules": {
+                rule.name: {
+                    "routes": [f"{rule.method} {path}" for path in rule.paths],
+                    "allowed": rule.allowed,
+                    "rejected": rule.rejected,
+                    "buckets": [
+                        {"scope": b.scope, "capacity": b.capacity, "refill_per_second": b.refill_per_second}
+                        for b in rule.buckets
+                    ],
+                }
+                for rule in self.rules
+            },
+        }
+
+def create_rate_limiter():
+    """Limiter for the configured backend ("memory" or "database")"""
+    if settings.rate_limit_backend == "database":
+        from database import SessionLocal
+        store = DatabaseBucketStore(SessionLocal)
+    else:
+        store = MemoryBucketStore()
+    return RateLimiter(store, default_rules())
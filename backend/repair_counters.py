@@ -0,0 +1,25 @@
+"""
+Recompute the site counters behind /api/stats from news_articles.
+
+Run after bulk loads or if the counters ever drift:
+    python repair_counters.py
+"""
+from database import SessionLocal
+import crud
+
+def repair_counters():
+    """Rebuild every counter and print the result"""
+    db = SessionLocal()
+    try:
+        before = crud.get_site_counters(db)
+        after = crud.rebuild_counters(db)
+        for name in sorted(set(before) | set(after)):
+            old, new = before.get(name, 0), after.get(name, 0)
+            marker = "" if old == new else f"  (was {old})"
+            print(f"{name}: {new}{marker}")
+        print("✅ Counters rebuilt")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    repair_counters()
@@ -1,15 +1,27 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from ai_service import ai_generator, CATEGORIES
+from config import get_settings
+from datetime import datetime
 import crud
+import generation_slots
+import idempotency
+import images
+import partitions
+import translations
 import schemas
 import random
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# The running scheduler's article listener, detached again by stop_scheduler
+_pipeline_listener = None
 
 def generate_daily_news():
     """Generate multiple fake news articles daily"""
@@ -18,27 +30,41 @@ def generate_daily_news():
         # Generate 5-8 random news articles
         num_articles = random.randint(5, 8)
         
-        for i in range(num_articles):
-            # Every 3rd article features the billionaire
-            include_billionaire = (i % 3 == 0)
-            category = random.choice(CATEGORIES)
-            
-            logger.info(f"Generating news article {i+1}/{num_articles} - Category: {category}, Billionaire: {include_billionaire}")
-            
-            # Generate news using AI
-            news_data = ai_generator.generate_news(
-                category=category,
-                include_billionaire=include_billionaire
+        # Every 3rd article features the billionaire
+        specs = [
+            {"category": random.choice(CATEGORIES), "include_billionaire": (i % 3 == 0)}
+            for i in range(num_articles)
+        ]
+        # No more per call than fit in the model's output limit
+        batch_size = max(1, min(settings.generation_batch_size, ai_generator.max_batch_size()))
+        if batch_size < settings.generation_batch_size:
+            logger.info(
+                f"GENERATION_BATCH_SIZE={settings.generation_batch_size} exceeds what fits in "
+                f"{ai_generator.model_name}'s output limit at LLM_MAX_OUTPUT_TOKENS="
+                f"{settings.llm_max_output_tokens}; generating {batch_size} per call"
+            )
+        
+        for start in range(0, num_articles, batch_size):
+            batch = specs[start:start + batch_size]
+            logger.info(
+                f"Generating news articles {start+1}-{start+len(batch)}/{num_articles} - "
+                + ", ".join(f"{spec['category']}{' (billionaire)' if spec['include_billionaire'] else ''}" for spec in batch)
             )
             
-            # Make some articles featured randomly
-            news_data['is_featured'] = random.random() < 0.3
-            
-            # Create article in database
-            article = schemas.NewsArticleCreate(**news_data)
-            crud.create_news_article(db, article)
+            # Generate news using AI: K articles per call, or one call each
+            if len(batch) > 1:
+                results = ai_generator.generate_news_batch(batch, source="scheduler")
+            else:
+                results = [ai_generator.generate_news(**batch[0])]
             
-            logger.info(f"Created article: {news_data['title']}")
+            for news_data in results:
+                # Make some articles featured randomly
+                news_data['is_featured'] = random.random() < 0.3
+                
+                # Create article and its usage log in database
+                crud.create_generated_article(db, news_data, source="scheduler")
+                
+                logger.info(f"Created article: {news_data['title']}")
         
         logger.info(f"Successfully generated {num_articles} news articles")
     except Exception as e:
@@ -46,28 +72,196 @@ def generate_daily_news():
     finally:
         db.close()
 
-def start_scheduler():
+def run_generation_slots():
+    """Generate the spread-schedule slots that are due (GENERATION_SCHEDULE=spread)"""
+    try:
+        generation_slots.run_due_slots()
+    except Exception as e:
+        logger.error(f"Error running generation slots: {str(e)}")
+
+def flush_counters():
+    """Write buffered article views to the site counters"""
+    db = SessionLocal()
+    try:
+        crud.flush_view_counter(db)
+    except Exception as e:
+        logger.error(f"Error flushing view counter: {str(e)}")
+    finally:
+        db.close()
+
+def translate_articles():
+    """Translate a batch of new articles into each configured locale"""
+    try:
+        translations.translate_recent()
+    except Exception as e:
+        logger.error(f"Error translating articles: {str(e)}")
+
+def ingest_article_images():
+    """Download and store images of new articles that link to an external image_url"""
+    db = SessionLocal()
+    try:
+        images.ingest_article_images(db)
+    except Exception as e:
+        logger.error(f"Error ingesting article images: {str(e)}")
+    finally:
+        db.close()
+
+def maintain_partitions():
+    """Create upcoming monthly news_articles partitions and archive old ones"""
+    db = SessionLocal()
+    try:
+        result = partitions.maintain(db)
+        if result["created"] or result["archived"]:
+            logger.info(f"Partitions created: {result['created']}, archived: {result['archived']}")
+    except Exception as e:
+        logger.error(f"Error maintaining partitions: {str(e)}")
+    finally:
+        db.close()
+
+def purge_idempotency_keys():
+    """Forget stored responses older than the idempotency TTL"""
+    try:
+        deleted = idempotency.purge_expired(idempotency.IdempotencyStore(SessionLocal))
+        if deleted:
+            logger.info(f"Purged {deleted} expired idempotency keys")
+    except Exception as e:
+        logger.error(f"Error purging idempotency keys: {str(e)}")
+
+def purge_rate_limit_buckets(rate_limiter):
+    """Forget rate-limit buckets that have refilled, so one-off clients don't pile up"""
+    try:
+        deleted = rate_limiter.purge_idle()
+        if deleted:
+            logger.info(f"Purged {deleted} idle rate-limit buckets")
+    except Exception as e:
+        logger.error(f"Error purging rate-limit buckets: {str(e)}")
+
+def generate_initial_news():
+    """Generate a first batch of articles if the database is empty"""
+    db = SessionLocal()
+    try:
+        is_empty = crud.get_article_count(db) == 0
+    finally:
+        db.close()
+    
+    if not is_empty:
+        return
+    logger.info("Database is empty, generating initial news articles...")
+    if settings.generation_schedule == "spread":
+        # Take today's next slots early so the fill counts against the quotas
+        generation_slots.run_due_slots(upcoming=True)
+    else:
+        generate_daily_news()
+
+def start_scheduler(seed_if_empty: bool = True, rate_limiter=None):
     """Start the background scheduler for daily news generation"""
+    global _pipeline_listener
     scheduler = BackgroundScheduler()
     
-    # Run daily at 6 AM
+    if settings.generation_schedule == "spread":
+        # Per-category quotas spread across the day, with catch-up after downtime
+        scheduler.add_job(
+            run_generation_slots,
+            trigger=IntervalTrigger(minutes=1),
+            id='generation_slots',
+            name='Generate due news slots',
+            replace_existing=True
+        )
+    else:
+        # Run daily at 6 AM
+        scheduler.add_job(
+            generate_daily_news,
+            trigger=CronTrigger(hour=6, minute=0),
+            id='daily_news_generation',
+            name='Generate daily fake news articles',
+            replace_existing=True
+        )
+    
     scheduler.add_job(
-        generate_daily_news,
-        trigger=CronTrigger(hour=6, minute=0),
-        id='daily_news_generation',
-        name='Generate daily fake news articles',
+        purge_idempotency_keys,
+        trigger=IntervalTrigger(hours=1),
+        id='purge_idempotency_keys',
+        name='Purge expired idempotency keys',
         replace_existing=True
     )
     
-    # Also generate news immediately on startup if database is empty
-    db = SessionLocal()
-    if crud.get_article_count(db) == 0:
-        logger.info("Database is empty, generating initial news articles...")
-        db.close()
-        generate_daily_news()
-    else:
-        db.close()
+    if rate_limiter is not None:
+        scheduler.add_job(
+            purge_rate_limit_buckets,
+            trigger=IntervalTrigger(minutes=10),
+            args=[rate_limiter],
+            id='purge_rate_limit_buckets',
+            name='Purge idle rate-limit buckets',
+            replace_existing=True
+        )
+    
+    # Partition upkeep (a no-op unless news_articles has been partitioned)
+    scheduler.add_job(
+        maintain_partitions,
+        trigger=CronTrigger(hour=0, minute=30),
+        id='maintain_partitions',
+        name='Maintain news_articles partitions',
+        replace_existing=True
+    )
+    
+    # Buffered view counts reach /api/stats within a few seconds
+    scheduler.add_job(
+        flush_counters,
+        trigger=IntervalTrigger(seconds=10),
+        id='flush_counters',
+        name='Flush buffered view counts',
+        replace_existing=True
+    )
+    
+    # Pipeline stages run right after an article is created, with an interval
+    # run as catch-up for anything that was missed or failed
+    pipeline_jobs = []
+    if settings.translation_locale_list:
+        scheduler.add_job(
+            translate_articles,
+            trigger=IntervalTrigger(seconds=settings.translation_interval_seconds),
+            id='translate_articles',
+            name='Translate new articles',
+            replace_existing=True
+        )
+        pipeline_jobs.append('translate_articles')
+    if settings.media_dir:
+        scheduler.add_job(
+            ingest_article_images,
+            trigger=IntervalTrigger(minutes=5),
+            id='ingest_article_images',
+            name='Ingest article images',
+            replace_existing=True
+        )
+        pipeline_jobs.append('ingest_article_images')
+    
+    if pipeline_jobs:
+        def run_pipeline_soon(action, info):
+            if action == "created":
+                for job_id in pipeline_jobs:
+                    scheduler.modify_job(job_id, next_run_time=datetime.now(scheduler.timezone))
+        
+        _pipeline_listener = run_pipeline_soon
+        crud.add_article_listener(run_pipeline_soon)
+    
+    # Seed an empty database from a one-off job on the scheduler's worker
+    # thread instead of blocking startup on several LLM calls
+    if seed_if_empty:
+        scheduler.add_job(
+            generate_initial_news,
+            id='initial_news_generation',
+            name='Generate initial news if database is empty',
+            replace_existing=True
+        )
     
     scheduler.start()
     logger.info("News generation scheduler started")
     return scheduler
+
+def stop_scheduler(scheduler):
+    """Shut the scheduler down and detach its article listener"""
+    global _pipeline_listener
+    if _pipeline_listener is not None:
+        crud.remove_article_listener(_pipeline_listener)
+        _pipeline_listener = None
+    scheduler.shutdown()
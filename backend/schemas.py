@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # User schemas
 class UserBase(BaseModel):
@@ -33,6 +33,28 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
+# Image schemas
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str
+    bytes: int
+    
+    class Config:
+        from_attributes = True
+
+class Image(BaseModel):
+    id: int
+    url: str
+    width: int
+    height: int
+    format: str
+    variants: List[ImageVariant]
+    
+    class Config:
+        from_attributes = True
+
 # News schemas
 class NewsArticleBase(BaseModel):
     title: str
@@ -41,6 +63,7 @@ class NewsArticleBase(BaseModel):
     author: str = "AI News Generator"
     location: str = "Manteiv"
     image_url: Optional[str] = None
+    image_id: Optional[int] = None  # an uploaded image (POST /api/images)
     is_featured: bool = False
 
 class NewsArticleCreate(NewsArticleBase):
@@ -50,10 +73,19 @@ class NewsArticle(NewsArticleBase):
     id: int
     published_date: datetime
     views: int
+    locale: str = "en"  # language of title and content
+    image: Optional[Image] = None  # stored copy of the article image with resized variants
     
     class Config:
         from_attributes = True
 
+class NewsBatchRequest(BaseModel):
+    ids: List[int]
+
+class NewsBatchResponse(BaseModel):
+    articles: List[NewsArticle]
+    missing: List[int]
+
 class NewsGenerationRequest(BaseModel):
     topic: Optional[str] = None
     category: str = "general"
@@ -89,3 +121,16 @@ class Feature(FeatureBase):
     
     class Config:
         from_attributes = True
+
+class FeatureBulkItemResult(BaseModel):
+    index: int
+    name: Optional[str] = None
+    status: str  # created, updated or skipped
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class FeatureBulkResult(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    items: List[FeatureBulkItemResult]
@@ -2,13 +2,10 @@
 Seed database with demo users for testing authentication
 """
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from database import SessionLocal, init_db
 import models
 from auth import get_password_hash
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
-
 def create_demo_users():
     """Create demo users with different roles"""
     db = SessionLocal()
@@ -67,4 +64,5 @@ def create_demo_users():
         db.close()
 
 if __name__ == "__main__":
+    init_db()
     create_demo_users()
@@ -0,0 +1,167 @@
+"""
+Static snapshot publisher for anonymous read traffic.
+
+Writes the JSON that the public read endpoints would return, plus a gzipped
+copy for nginx's gzip_static, into SNAPSHOT_DIR:
+
+    news/index.json               GET /api/news
+    news/featured.json            GET /api/news/featured
+    news/category/<name>.json     GET /api/news?category=<name>
+
+Article detail reads (GET /api/news/<id>) always reach the backend, since
+they record a view. Article changes mark only the affected listings dirty; a
+single worker thread re-renders them and rewrites a file only when its bytes
+changed. The listings are also re-rendered every REFRESH_SECONDS so the view
+counts in them keep moving.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import crud
+import schemas
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 20  # default page of GET /api/news
+FEATURED_LIMIT = 5  # default of GET /api/news/featured
+REFRESH_SECONDS = 300
+ALL = "all"
+
+# Categories with other characters are left to the backend (see the nginx config)
+SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+def _serialize(articles) -> bytes:
+    return json.dumps(
+        [schemas.NewsArticle.model_validate(a).model_dump(mode="json") for a in articles],
+        separators=(",", ":")
+    ).encode()
+
+class SnapshotPublisher:
+    def __init__(self, directory: str, session_factory):
+        self.directory = directory
+        self.session_factory = session_factory
+        self._dirty = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self.files_written = 0
+        self.files_unchanged = 0
+    
+    def start(self):
+        """Start the worker and queue a full publish"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-publisher", daemon=True)
+            self._thread.start()
+        self.mark(ALL)
+    
+    def mark(self, *keys):
+        with self._cond:
+            self._dirty.update(keys)
+            self._cond.notify()
+    
+    def article_changed(self, action: str, info: dict):
+        """crud article listener: re-render only the pages this article appears on"""
+        keys = ["index", ("category", info["category"])]
+        if info["is_featured"]:
+            keys.append("featured")
+        self.mark(*keys)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._dirty:
+                    self._cond.wait(timeout=REFRESH_SECONDS)
+                # Nothing changed for a while: refresh the listings' view counts
+                dirty, self._dirty = self._dirty or {ALL}, set()
+            try:
+                self.publish(ALL if ALL in dirty else dirty)
+            except Exception as e:
+                logger.error(f"Snapshot publish failed: {str(e)}")
+    
+    def publish(self, keys):
+        """Render the given keys, or every snapshot for ALL"""
+        db = self.session_factory()
+        try:
+            if keys == ALL:
+                self._publish_all(db)
+            else:
+                for key in keys:
+                    self._publish_key(db, key)
+        finally:
+            db.close()
+    
+    def _publish_key(self, db, key):
+        if key == "index":
+            self._write("news/index.json", _serialize(crud.get_news_articles(db, limit=PAGE_SIZE)))
+        elif key == "featured":
+            self._write("news/featured.json", _serialize(crud.get_featured_news(db, limit=FEATURED_LIMIT)))
+        elif key[0] == "category":
+            self._publish_category(db, key[1])
+    
+    def _publish_category(self, db, category: str):
+        if SAFE_NAME.match(category):
+            articles = crud.get_news_articles(db, limit=PAGE_SIZE, category=category)
+            self._write(f"news/category/{category}.json", _serialize(articles))
+    
+    def _publish_all(self, db):
+        """The listings only, so this stays cheap however many articles there are"""
+        self._publish_key(db, "index")
+        self._publish_key(db, "featured")
+        # The category counters list the categories without scanning news_articles
+        for name, count in crud.get_site_counters(db).items():
+            if name.startswith(crud.CATEGORY_COUNTER_PREFIX):
+                category = name[len(crud.CATEGORY_COUNTER_PREFIX):]
+                if count > 0:
+                    self._publish_category(db, category)
+                elif SAFE_NAME.match(category):
+                    self._remove(f"news/category/{category}.json")
+        
+        # Per-article snapshots written by earlier versions would be served stale
+        news_dir = os.path.join(self.directory, "news")
+        for name in os.listdir(news_dir):
+            if re.match(r"^\d+\.json(\.gz)?$", name):
+                self._remove(f"news/{name.removesuffix('.gz')}")
+    
+    def _write(self, relative_path: str, data: bytes):
+        """Atomically write data and its .gz twin, skipping files whose content is unchanged"""
+        path = os.path.join(self.directory, relative_path)
+        try:
+            with open(path, "rb") as f:
+                if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                    self.files_unchanged += 1
+                    return
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write the .gz first so nginx never pairs a new .json with a stale .gz for long
+        self._replace(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        self._replace(path, data)
+        self.files_written += 1
+    
+    @staticmethod
+    def _replace(path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    
+    def _remove(self, relative_path: str):
+        path = os.path.join(self.directory, relative_path)
+        for p in (path, path + ".gz"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+def create_publisher(directory: str):
+    """Publisher wired to crud's article listeners; call start() to begin publishing"""
+    from database import SessionLocal
+    os.makedirs(os.path.join(directory, "news", "category"), exist_ok=True)
+    publisher = SnapshotPublisher(directory, SessionLocal)
+    crud.add_article_listener(publisher.article_changed)
+    return publisher
@@ -0,0 +1,330 @@
+"""
+Synthetic dataset generator for capacity and query-plan testing.
+
+Fills a database with articles, users and features of every type, shaped
+like production data rather than uniform noise:
+
+- categories follow a skewed mix (Politics and Economy lead, Health trails)
+- publishing grows towards --end, dips at weekends and peaks in the daytime;
+  ids follow publication order, as they do for generated articles
+- views are heavy-tailed, grow with age and are higher for featured articles
+- content length is log-normal: mostly a handful of paragraphs, a few long reads
+
+Rows are bulk loaded with COPY on PostgreSQL (into the month partitions when
+news_articles is partitioned) and batched executemany on SQLite, then the site
+counters are rebuilt. Each table draws from its own random stream, so the same
+--seed and --end give the same rows, and changing one count leaves the other
+tables alone. Ids come from the database: load into an empty scratch database.
+
+Every synthetic user's password is "synthetic123".
+
+Usage:
+    python synthetic_data.py --articles 1000000 --users 10000 --features 5000 [--seed 42] [--end 2026-10-01]
+"""
+from datetime import date, datetime, timedelta, timezone
+import argparse
+import csv
+import io
+import math
+import random
+import time
+
+import bcrypt
+from sqlalchemy import text
+
+import crud
+import models
+import partitions
+from ai_service import CATEGORIES
+from database import SessionLocal, init_db
+
+PASSWORD = "synthetic123"
+DEFAULT_AUTHOR = "AI News Generator"
+DEFAULT_LOCATION = "Manteiv"
+
+# Relative share of each category; categories not listed get 1
+CATEGORY_WEIGHTS = {
+    "Politics": 22, "Economy": 16, "Technology": 15, "Sports": 14,
+    "Entertainment": 12, "Business": 9, "Science": 7, "Health": 5,
+}
+# Articles per hour of the day (UTC), relative
+HOUR_WEIGHTS = [1, 1, 1, 1, 2, 4, 8, 9, 9, 8, 7, 7, 6, 6, 6, 6, 6, 5, 5, 4, 3, 2, 2, 1]
+# Saturday and Sunday publish less
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.95, 0.6, 0.5]
+# The newest day gets (1 + GROWTH) times the rows of the oldest
+GROWTH = 3.0
+
+FIRST_NAMES = [
+    "Anna", "Minh", "Lukas", "Sofia", "Quang", "Elena", "Marco", "Linh", "Daniel", "Mai",
+    "Ivan", "Chloe", "Tuan", "Nadia", "Oscar", "Hana", "Pavel", "Lea", "Bao", "Iris",
+    "Victor", "Yen", "Felix", "Nora", "Khoa", "Greta", "Hugo", "Thu", "Emil", "Vera",
+]
+LAST_NAMES = [
+    "Nguyen", "Petrov", "Rossi", "Tran", "Novak", "Schmidt", "Le", "Horvat", "Pham", "Garcia",
+    "Kowalski", "Vu", "Moreau", "Dang", "Berg", "Hoang", "Costa", "Ivanova", "Bui", "Lindqvist",
+]
+DISTRICTS = [
+    "Old Town", "Riverside", "North Manteiv", "Harbor District", "Eastgate", "Hillcrest",
+    "Market Quarter", "West Bank", "Lakeside", "University Hill", "Southport", "Greenfield",
+]
+PLACE_KINDS = [
+    "Market", "Bridge", "Station", "Square", "Park", "Tower", "Harbor", "Museum",
+    "Stadium", "Library", "Cathedral", "Plaza", "Gardens", "Pier", "Theater", "Hospital",
+]
+PLACE_PREFIXES = ["Old", "New", "Grand", "Central", "Upper", "Lower", "Royal", "Little", "East", "West"]
+WEATHER_INTENSITIES = ["Light", "Heavy", "Sudden", "Persistent", "Freak", "Record", "Mild", "Severe", "Unseasonal", "Rolling"]
+WEATHER_KINDS = [
+    "Rain", "Snowfall", "Fog", "Heatwave", "Hailstorm", "Thunderstorm", "Drizzle", "Frost",
+    "Windstorm", "Sandstorm", "Monsoon", "Cold Snap", "Humidity", "Sunshine", "Blizzard",
+]
+EVENT_QUALIFIERS = ["Annual", "Grand", "International", "Midnight", "Spring", "Winter", "Charity", "Royal", "Secret", "Floating"]
+EVENT_KINDS = [
+    "Lantern Festival", "Marathon", "Tech Summit", "Food Fair", "Regatta", "Film Festival",
+    "Chess Open", "Jazz Night", "Book Fair", "Parade", "Gala", "Science Expo", "Auction", "Hackathon",
+]
+SUBJECTS = [
+    "Local billionaire", "Manteiv mayor", "City council", "Startup founder", "National team",
+    "Central bank", "Retired professor", "Pop star", "Hospital board", "Tech giant",
+    "Fishermen's union", "Opposition leader", "Museum curator", "Celebrity chef", "Research team",
+]
+VERBS = [
+    "unveils", "cancels", "announces", "rejects", "celebrates", "investigates", "buys",
+    "promises", "defends", "launches", "abandons", "doubles", "questions", "wins", "loses",
+]
+OBJECTS = [
+    "plan for a floating stadium", "record budget", "new tax on umbrellas", "controversial merger",
+    "mystery donation", "flying tram prototype", "ban on late-night karaoke", "national holiday",
+    "giant solar farm", "cure for boredom", "free ferry rides", "gold-plated bicycle lanes",
+    "AI-run newspaper", "underwater concert hall", "four-day week",
+]
+SENTENCE_OPENERS = [
+    "According to officials,", "Witnesses said", "Sources close to the matter confirmed that",
+    "In a surprise statement,", "Residents of Manteiv reported that", "Experts warned that",
+    "Critics argued that", "Supporters insisted that", "Later that day,", "It remains unclear whether",
+]
+SENTENCE_CLAIMS = [
+    "the decision would change the city forever", "nobody had been told in advance",
+    "the budget had already been spent twice", "the project was ahead of schedule",
+    "several ministers were seen leaving early", "the numbers did not add up",
+    "a second announcement is expected next week", "the crowd outside kept growing",
+    "the idea first came up at a family dinner", "prices in the old market doubled overnight",
+    "the committee will meet again on Monday", "local cafes ran out of coffee by noon",
+]
+SENTENCE_ENDINGS = [
+    ".", ", despite earlier denials.", ", according to a leaked memo.", " for the third time this year.",
+    ", to the delight of many.", ", which surprised even the organizers.", " while the city watched.",
+]
+
+class _Pools:
+    """Word combinations drawn once per seed, so per-row generation stays cheap"""
+
+    def __init__(self, seed: int):
+        rng = random.Random(f"{seed}:pools")
+        self.sentences = [
+            f"{rng.choice(SENTENCE_OPENERS)} {rng.choice(SENTENCE_CLAIMS)}{rng.choice(SENTENCE_ENDINGS)}"
+            for _ in range(4000)
+        ]
+        self.authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(200)]
+
+def timeline(rng: random.Random, count: int, end: date, days: int):
+    """count UTC datetimes in ascending order over the days up to end, weighted like real publishing"""
+    start = end - timedelta(days=days - 1)
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        growth = 1 + GROWTH * offset / max(days - 1, 1)
+        weights.append(growth * WEEKDAY_WEIGHTS[day.weekday()] * rng.lognormvariate(0, 0.2))
+    total = sum(weights)
+    cumulative, allotted = 0.0, 0
+    hours = list(range(24))
+    for offset, weight in enumerate(weights):
+        # Cumulative rounding, so the days add up to exactly count
+        cumulative += weight
+        target = round(count * cumulative / total)
+        day = start + timedelta(days=offset)
+        midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        seconds = sorted(
+            hour * 3600 + rng.randrange(3600)
+            for hour in rng.choices(hours, weights=HOUR_WEIGHTS, k=target - allotted)
+        )
+        for second in seconds:
+            yield midnight + timedelta(seconds=second, microseconds=rng.randrange(1000000))
+        allotted = target
+
+def _unique(name: str, seen: set, last_number: dict) -> str:
+    """name, or name with the next free number appended; last_number[name] remembers where to resume"""
+    candidate, number = name, last_number.get(name, 1)
+    while candidate in seen:
+        number += 1
+        candidate = f"{name} {number}"
+    last_number[name] = number
+    seen.add(candidate)
+    return candidate
+
+ARTICLE_COLUMNS = ["title", "content", "category", "author", "location", "published_date", "is_featured", "views"]
+
+def generate_articles(seed: int, count: int, end: date, days: int):
+    """Rows for news_articles, in ARTICLE_COLUMNS order and publication order"""
+    rng = random.Random(f"{seed}:articles")
+    pools = _Pools(seed)
+    categories = list(CATEGORIES)
+    category_weights = [CATEGORY_WEIGHTS.get(category, 1) for category in categories]
+    end_of_day = datetime(end.year, end.month, end.day, tzinfo=timezone.utc) + timedelta(days=1)
+    for published in timeline(rng, count, end, days):
+        featured = rng.random() < 0.05
+        age_days = (end_of_day - published).total_seconds() / 86400
+        views = rng.lognormvariate(2.5, 1.3) * math.sqrt(1 + age_days) * (4 if featured else 1)
+        title = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+        if rng.random() < 0.4:
+            title += f" in {rng.choice(DISTRICTS)}"
+        paragraphs = min(max(int(rng.lognormvariate(1.6, 0.45)), 2), 30)
+        content = "\n\n".join(
+            " ".join(rng.choices(pools.sentences, k=rng.randint(2, 6))) for _ in range(paragraphs)
+        )
+        yield (
+            title,
+            content,
+            rng.choices(categories, weights=category_weights)[0],
+            DEFAULT_AUTHOR if rng.random() < 0.85 else rng.choice(pools.authors),
+            DEFAULT_LOCATION if rng.random() < 0.8 else rng.choice(DISTRICTS),
+            published,
+            featured,
+            int(views),
+        )
+
+USER_COLUMNS = ["username", "email", "hashed_password", "full_name", "role", "is_active", "created_at"]
+
+def _password_hash(rng: random.Random) -> str:
+    """bcrypt hash of PASSWORD with a salt from rng, so reruns give the same bytes"""
+    alphabet = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    # The last salt character only carries 4 bits; pick one bcrypt keeps as is
+    salt = "".join(rng.choice(alphabet) for _ in range(21)) + rng.choice(".Oeu")
+    return bcrypt.hashpw(PASSWORD.encode(), f"$2b$12${salt}".encode()).decode()
+
+def generate_users(seed: int, count: int, end: date, days: int):
+    """Rows for users, in USER_COLUMNS order and sign-up order"""
+    rng = random.Random(f"{seed}:users")
+    hashed_password = _password_hash(rng)
+    roles = [models.UserRole.ADMIN.name, models.UserRole.AUTHOR.name, models.UserRole.VIEWER.name]
+    for number, created in enumerate(timeline(rng, count, end, days), start=1):
+        username = f"user{number:07d}"
+        yield (
+            username,
+            f"{username}@example.com",
+            hashed_password,
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            rng.choices(roles, weights=[1, 25, 474])[0],
+            rng.random() < 0.97,
+            created,
+        )
+
+FEATURE_COLUMNS = ["name", "description", "created_at", "created_by"]
+
+FEATURE_NAMES = {
+    "characters": lambda rng: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+    "places": lambda rng: f"{rng.choice(PLACE_PREFIXES)} {rng.choice(DISTRICTS)} {rng.choice(PLACE_KINDS)}",
+    "weather": lambda rng: f"{rng.choice(WEATHER_INTENSITIES)} {rng.choice(WEATHER_KINDS)}",
+    "events": lambda rng: f"{rng.choice(EVENT_QUALIFIERS)} {rng.choice(EVENT_KINDS)}",
+}
+
+def generate_features(seed: int, table: str, count: int, end: date, days: int):
+    """Rows for one feature table, in FEATURE_COLUMNS order and creation order"""
+    rng = random.Random(f"{seed}:{table}")
+    pools = _Pools(seed)
+    seen, last_number = set(), {}
+    for created in timeline(rng, count, end, days):
+        yield (
+            _unique(FEATURE_NAMES[table](rng), seen, last_number),
+            rng.choice(pools.sentences) if rng.random() < 0.7 else None,
+            created,
+            rng.choices(["admin", "author"], weights=[1, 3])[0],
+        )
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _sqlite_value(value):
+    # The storage format SQLAlchemy's SQLite DateTime reads back (naive UTC)
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+    return value
+
+def bulk_load(db, table: str, columns: list, rows, batch_size: int = 10000) -> int:
+    """COPY (PostgreSQL) or executemany (SQLite) rows into table, one batch at a time"""
+    loaded = 0
+    if db.get_bind().dialect.name == "postgresql":
+        cursor = db.connection().connection.cursor()
+        statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        for batch in _batches(rows, batch_size):
+            buffer = io.StringIO()
+            # None becomes an unquoted empty field, which COPY reads as NULL
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            loaded += len(batch)
+    else:
+        statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        for batch in _batches(rows, batch_size):
+            db.connection().exec_driver_sql(statement, [tuple(_sqlite_value(v) for v in row) for row in batch])
+            loaded += len(batch)
+    db.commit()
+    return loaded
+
+def load(db, articles: int = 0, users: int = 0, features: int = 0, seed: int = 42,
+         end: date = None, days: int = 730, batch_size: int = 10000, verbose: bool = False) -> dict:
+    """Generate and load the dataset; returns {table: rows loaded}"""
+    end = end or datetime.now(timezone.utc).date()
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if postgres and articles and partitions.is_partitioned(db):
+        # Give every month of the range its own partition instead of the default one
+        partitions.ensure_partitions(db, start=end - timedelta(days=days - 1))
+    jobs = [
+        (models.NewsArticle.__tablename__, ARTICLE_COLUMNS, articles,
+         lambda: generate_articles(seed, articles, end, days)),
+        (models.User.__tablename__, USER_COLUMNS, users,
+         lambda: generate_users(seed, users, end, days)),
+    ] + [
+        (table, FEATURE_COLUMNS, features,
+         lambda table=table: generate_features(seed, table, features, end, days))
+        for table in models.FEATURE_MODELS
+    ]
+    loaded = {}
+    for table, columns, count, rows in jobs:
+        if count <= 0:
+            continue
+        started = time.perf_counter()
+        loaded[table] = bulk_load(db, table, columns, rows(), batch_size)
+        if postgres:
+            db.execute(text(f"ANALYZE {table}"))
+            db.commit()
+        if verbose:
+            print(f"{table}: {loaded[table]} rows in {time.perf_counter() - started:.1f}s")
+    if articles:
+        crud.rebuild_counters(db)
+    return loaded
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill the database with a reproducible synthetic dataset")
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--features", type=int, default=1000, help="rows per feature type")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="newest day, YYYY-MM-DD (default: today, UTC)")
+    parser.add_argument("--days", type=int, default=730, help="days of history up to --end")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per COPY / executemany")
+    args = parser.parse_args()
+    init_db()
+    db = SessionLocal()
+    try:
+        load(db, articles=args.articles, users=args.users, features=args.features, seed=args.seed,
+             end=args.end, days=args.days, batch_size=args.batch_size, verbose=True)
+        print("✅ Synthetic data loaded (site counters rebuilt; run `python feeds.py` to rebuild feeds)")
+    finally:
+        db.close()
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Settings require a database; without DATABASE_URL the tests use a scratch
+# SQLite file (set it to a Postgres scratch database to test that instead)
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("SEED_ON_STARTUP", "false")
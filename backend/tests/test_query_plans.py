@@ -0,0 +1,23 @@
+"""Every crud.py query from check_query_plans.py must be index-backed on a seeded database"""
+import pytest
+
+import check_query_plans
+import crud
+from database import SessionLocal, init_db
+
+SEED_ARTICLES = 3000
+CASES = check_query_plans.query_cases()
+
+@pytest.fixture(scope="module")
+def db():
+    init_db()
+    session = SessionLocal()
+    if crud.get_article_count(session) == 0:
+        check_query_plans.seed(session, SEED_ARTICLES)
+    check_query_plans.analyze()
+    yield session
+    session.close()
+
+@pytest.mark.parametrize("name, fn", CASES, ids=[name for name, _ in CASES])
+def test_query_is_index_backed(db, name, fn):
+    assert check_query_plans.check_case(db, name, fn) == []
@@ -0,0 +1,19 @@
+"""Startup budgets from check_startup.py"""
+import socket
+
+import check_startup
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_import_within_budget_and_sdks_lazy():
+    import_time, eager = check_startup.measure_import_time()
+    assert import_time <= check_startup.IMPORT_BUDGET_SECONDS
+    assert eager == []
+
+def test_ready_within_budget():
+    ready_time = check_startup.measure_time_to_ready(_free_port(), timeout=check_startup.READY_BUDGET_SECONDS * 2)
+    assert ready_time is not None, "app never became ready"
+    assert ready_time <= check_startup.READY_BUDGET_SECONDS
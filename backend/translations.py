@@ -0,0 +1,142 @@
+"""
+Article translation pipeline stage.
+
+Articles published in the last TRANSLATION_MAX_AGE_HOURS are translated into
+settings.translation_locales in the background (scheduler.translate_articles)
+and stored in article_translations, so reads never wait on the LLM. Until a
+translation exists the source text is served. Translation is off unless
+TRANSLATION_LOCALES is set, and enabling it doesn't translate the archive.
+
+Backfill existing articles with:
+    python translations.py --concurrency 4
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import argparse
+import logging
+import threading
+import time
+from database import SessionLocal
+from ai_service import ai_generator
+from config import get_settings
+import crud
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Articles are skipped for FAILURE_EXPIRY_SECONDS after this many failed attempts;
+# at most MAX_TRACKED_FAILURES are remembered (oldest dropped first)
+MAX_ATTEMPTS = 3
+FAILURE_EXPIRY_SECONDS = 6 * 3600
+MAX_TRACKED_FAILURES = 1000
+_failures = OrderedDict()  # (article_id, locale) -> (failed attempts, last failure monotonic time)
+_failures_lock = threading.Lock()
+
+def supported_locales():
+    return [settings.source_locale] + [
+        locale for locale in settings.translation_locale_list if locale != settings.source_locale
+    ]
+
+def negotiate_locale(accept_language: str = None) -> str:
+    """Best supported locale for an Accept-Language header, else the source locale"""
+    supported = supported_locales()
+    candidates = []
+    for position, part in enumerate((accept_language or "").split(",")):
+        tag, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        tag = tag.strip().lower()
+        if tag and quality > 0:
+            candidates.append((-quality, position, tag))
+    for _, _, tag in sorted(candidates):
+        if tag == "*":
+            return settings.source_locale
+        language = tag.split("-")[0]
+        if language in supported:
+            return language
+    return settings.source_locale
+
+def _translate_one(article_id: int, title: str, content: str, locale: str) -> bool:
+    key = (article_id, locale)
+    try:
+        translation, generation = ai_generator.translate_article(title, content, locale)
+    except Exception as e:
+        with _failures_lock:
+            count = _failures.pop(key, (0, 0))[0]
+            _failures[key] = (count + 1, time.monotonic())
+            while len(_failures) > MAX_TRACKED_FAILURES:
+                _failures.popitem(last=False)
+        logger.warning(f"Translating article {article_id} to {locale} failed: {str(e)}")
+        return False
+    db = SessionLocal()
+    try:
+        return crud.create_article_translation(db, article_id, locale, translation, generation)
+    finally:
+        db.close()
+
+def _skipped_ids(locale: str):
+    """Articles that failed MAX_ATTEMPTS times recently; expired entries are forgotten"""
+    cutoff = time.monotonic() - FAILURE_EXPIRY_SECONDS
+    with _failures_lock:
+        # Entries are in last-failure order, so expired ones are at the front
+        while _failures and next(iter(_failures.values()))[1] < cutoff:
+            _failures.popitem(last=False)
+        return [aid for (aid, loc), (count, _) in _failures.items() if loc == locale and count >= MAX_ATTEMPTS]
+
+def translate_pending(locales: list = None, batch_size: int = None, concurrency: int = None, since: datetime = None):
+    """Translate one batch of untranslated articles per locale (published since `since`, if given); returns (stored, attempted)"""
+    locales = locales if locales is not None else settings.translation_locale_list
+    batch_size = batch_size or settings.translation_batch_size
+    concurrency = max(1, concurrency or settings.translation_concurrency)
+    translated = attempted = 0
+    for locale in locales:
+        if locale == settings.source_locale:
+            continue
+        exclude = _skipped_ids(locale)
+        db = SessionLocal()
+        try:
+            batch = [
+                (a.id, a.title, a.content)
+                for a in crud.get_untranslated_articles(db, locale, limit=batch_size, exclude_ids=exclude, since=since)
+            ]
+        finally:
+            db.close()
+        if not batch:
+            continue
+        # Bounded fan-out: at most `concurrency` LLM calls in flight
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(batch))) as pool:
+            results = list(pool.map(lambda item: _translate_one(*item, locale), batch))
+        translated += sum(results)
+        attempted += len(batch)
+        logger.info(f"Translated {sum(results)}/{len(batch)} articles to {locale}")
+    return translated, attempted
+
+def translate_recent():
+    """Scheduled run: only articles published in the last TRANSLATION_MAX_AGE_HOURS"""
+    since = datetime.now(timezone.utc) - timedelta(hours=settings.translation_max_age_hours)
+    return translate_pending(since=since)
+
+def backfill(locales: list = None, batch_size: int = None, concurrency: int = None) -> int:
+    """Translate every existing article, batch by batch, until nothing is left to try"""
+    total = 0
+    while True:
+        translated, attempted = translate_pending(locales, batch_size, concurrency)
+        total += translated
+        if not attempted:
+            return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill article translations")
+    parser.add_argument("--locales", help="comma-separated locales (default: TRANSLATION_LOCALES)")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=None, help="parallel LLM calls")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    locales = [l.strip().lower() for l in args.locales.split(",")] if args.locales else None
+    total = backfill(locales, args.batch_size, args.concurrency)
+    print(f"✅ Stored {total} translations")
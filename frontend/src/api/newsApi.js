@@ -4,39 +4,78 @@ import axios from 'axios';
 // In dev, Vite proxy handles it (see vite.config.js)
 const API_BASE_URL = '/api';
 
+// Articles come back translated where a translation exists (see LanguageContext)
+const languageHeaders = () => ({ 'Accept-Language': localStorage.getItem('language') || 'en' });
+
+// One page of a feature list; resolves to { items, nextCursor } (null on the last page).
+// q filters by name (substring match); pass the previous page's nextCursor as cursor
+const featurePage = async (type, { cursor = null, q = '' } = {}) => {
+  const params = {};
+  if (cursor) params.cursor = cursor;
+  if (q) {
+    params.q = q;
+    params.match = 'contains';
+  }
+  const response = await axios.get(`${API_BASE_URL}/features/${type}`, { params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 export const newsApi = {
   // Get all news articles
   getAllNews: async (skip = 0, limit = 20, category = null) => {
     const params = { skip, limit };
     if (category) params.category = category;
-    const response = await axios.get(`${API_BASE_URL}/news`, { params });
+    const response = await axios.get(`${API_BASE_URL}/news`, { params, headers: languageHeaders() });
     return response.data;
   },
 
   // Get featured news
   getFeaturedNews: async (limit = 5) => {
     const response = await axios.get(`${API_BASE_URL}/news/featured`, {
-      params: { limit }
+      params: { limit },
+      headers: languageHeaders()
     });
     return response.data;
   },
 
   // Get single article
   getArticle: async (id) => {
-    const response = await axios.get(`${API_BASE_URL}/news/${id}`);
+    const response = await axios.get(`${API_BASE_URL}/news/${id}`, { headers: languageHeaders() });
     return response.data;
   },
 
-  // Generate new news article
-  generateNews: async (topic = null, category = 'general', includeBillionaire = false) => {
-    const response = await axios.post(`${API_BASE_URL}/news/generate`, {
-      topic,
-      category,
-      include_billionaire: includeBillionaire
-    });
+  // Get many articles in one request; resolves to { articles, missing }
+  getArticlesBatch: async (ids) => {
+    const response = ids.length > 100
+      ? await axios.post(`${API_BASE_URL}/news/batch`, { ids })
+      : await axios.get(`${API_BASE_URL}/news/batch`, { params: { ids: ids.join(',') } });
     return response.data;
   },
 
+  // Subscribe to article created/updated/deleted events; returns an unsubscribe function
+  subscribeToNews: (onEvent) => {
+    const source = new EventSource(`${API_BASE_URL}/news/stream`);
+    const handler = (e) => onEvent(JSON.parse(e.data));
+    ['article.created', 'article.updated', 'article.deleted', 'resync'].forEach((type) => source.addEventListener(type, handler));
+    return () => source.close();
+  },
+
+  // Generate new news article; a retry after a gateway timeout reuses the same
+  // Idempotency-Key, so the server replays the first result instead of generating twice
+  generateNews: async (topic = null, category = 'general', includeBillionaire = false) => {
+    const body = { topic, category, include_billionaire: includeBillionaire };
+    const headers = { 'Idempotency-Key': crypto.randomUUID() };
+    try {
+      const response = await axios.post(`${API_BASE_URL}/news/generate`, body, { headers });
+      return response.data;
+    } catch (error) {
+      const status = error.response?.status;
+      if (error.response && status !== 502 && status !== 504) throw error;
+      const response = await axios.post(`${API_BASE_URL}/news/generate`, body, { headers });
+      return response.data;
+    }
+  },
+
   // Get categories
   getCategories: async () => {
     const response = await axios.get(`${API_BASE_URL}/categories`);
@@ -63,10 +102,7 @@ export const newsApi = {
 
   // Features API
   // Characters
-  getCharacters: async () => {
-    const response = await axios.get(`${API_BASE_URL}/features/characters`);
-    return response.data;
-  },
+  getCharacters: async (options = {}) => featurePage('characters', options),
   createCharacter: async (name, description) => {
     const response = await axios.post(`${API_BASE_URL}/features/characters`, { name, description });
     return response.data;
@@ -81,10 +117,7 @@ export const newsApi = {
   },
 
   // Places
-  getPlaces: async () => {
-    const response = await axios.get(`${API_BASE_URL}/features/places`);
-    return response.data;
-  },
+  getPlaces: async (options = {}) => featurePage('places', options),
   createPlace: async (name, description) => {
     const response = await axios.post(`${API_BASE_URL}/features/places`, { name, description });
     return response.data;
@@ -99,10 +132,7 @@ export const newsApi = {
   },
 
   // Weather
-  getWeather: async () => {
-    const response = await axios.get(`${API_BASE_URL}/features/weather`);
-    return response.data;
-  },
+  getWeather: async (options = {}) => featurePage('weather', options),
   createWeather: async (name, description) => {
     const response = await axios.post(`${API_BASE_URL}/features/weather`, { name, description });
     return response.data;
@@ -117,10 +147,7 @@ export const newsApi = {
   },
 
   // Events
-  getEvents: async () => {
-    const response = await axios.get(`${API_BASE_URL}/features/events`);
-    return response.data;
-  },
+  getEvents: async (options = {}) => featurePage('events', options),
   createEvent: async (name, description) => {
     const response = await axios.post(`${API_BASE_URL}/features/events`, { name, description });
     return response.data;
@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useState, useEffect } from 'react'
+import React, { createContext, useContext, useState } from 'react'
 import { translations } from '../i18n/translations'
 
 const LanguageContext = createContext()
@@ -17,22 +17,27 @@ export const LanguageProvider = ({ children }) => {
     return localStorage.getItem('language') || 'en'
   })
 
-  useEffect(() => {
-    // Save language preference to localStorage
-    localStorage.setItem('language', language)
-  }, [language])
+  // Save language preference to localStorage as soon as it changes, so the
+  // refetches it triggers already send the new Accept-Language (see newsApi)
+  const changeLanguage = (next) => {
+    setLanguage(prev => {
+      const value = typeof next === 'function' ? next(prev) : next
+      localStorage.setItem('language', value)
+      return value
+    })
+  }
 
   const t = (key) => {
     return translations[language][key] || key
   }
 
   const toggleLanguage = () => {
-    setLanguage(prev => prev === 'en' ? 'vi' : 'en')
+    changeLanguage(prev => prev === 'en' ? 'vi' : 'en')
   }
 
   const value = {
     language,
-    setLanguage,
+    setLanguage: changeLanguage,
     toggleLanguage,
     t
   }
@@ -11,7 +11,7 @@ const ArticlePage = () => {
 
   useEffect(() => {
     fetchArticle()
-  }, [id])
+  }, [id, language])
 
   const fetchArticle = async () => {
     try {
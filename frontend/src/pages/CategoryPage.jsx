@@ -6,13 +6,13 @@ import { useLanguage } from '../contexts/LanguageContext'
 
 const CategoryPage = () => {
   const { category } = useParams()
-  const { t } = useLanguage()
+  const { t, language } = useLanguage()
   const [news, setNews] = useState([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     fetchCategoryNews()
-  }, [category])
+  }, [category, language])
 
   const fetchCategoryNews = async () => {
     try {
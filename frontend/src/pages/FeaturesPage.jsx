@@ -13,33 +13,53 @@ const FeaturesPage = () => {
   const [weather, setWeather] = useState([])
   const [events, setEvents] = useState([])
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // Lists come a page at a time; the cursor of each tab's next page, or null
+  const [nextCursors, setNextCursors] = useState({})
+  const [search, setSearch] = useState('')
   
   const [showAddModal, setShowAddModal] = useState(false)
   const [editingItem, setEditingItem] = useState(null)
   const [formName, setFormName] = useState('')
   const [formDescription, setFormDescription] = useState('')
 
+  const fetchers = {
+    characters: newsApi.getCharacters,
+    places: newsApi.getPlaces,
+    weather: newsApi.getWeather,
+    events: newsApi.getEvents
+  }
+  const setters = {
+    characters: setCharacters,
+    places: setPlaces,
+    weather: setWeather,
+    events: setEvents
+  }
+
   useEffect(() => {
     if (!canGenerateNews()) {
       navigate('/')
-      return
     }
-    fetchAllFeatures()
   }, [canGenerateNews, navigate])
 
-  const fetchAllFeatures = async () => {
+  // Searching is done by the server, so it covers every item, not just the loaded pages
+  useEffect(() => {
+    if (!canGenerateNews()) return
+    const timer = setTimeout(() => fetchAllFeatures(search), search ? 300 : 0)
+    return () => clearTimeout(timer)
+  }, [search])
+
+  const fetchAllFeatures = async (q = search) => {
     try {
       setLoading(true)
-      const [chars, plcs, wthr, evts] = await Promise.all([
-        newsApi.getCharacters(),
-        newsApi.getPlaces(),
-        newsApi.getWeather(),
-        newsApi.getEvents()
-      ])
-      setCharacters(chars)
-      setPlaces(plcs)
-      setWeather(wthr)
-      setEvents(evts)
+      const tabs = Object.keys(fetchers)
+      const pages = await Promise.all(tabs.map((tab) => fetchers[tab]({ q })))
+      const cursors = {}
+      tabs.forEach((tab, i) => {
+        setters[tab](pages[i].items)
+        cursors[tab] = pages[i].nextCursor
+      })
+      setNextCursors(cursors)
     } catch (error) {
       console.error('Error fetching features:', error)
     } finally {
@@ -47,6 +67,20 @@ const FeaturesPage = () => {
     }
   }
 
+  const loadMore = async () => {
+    const tab = activeTab
+    try {
+      setLoadingMore(true)
+      const page = await fetchers[tab]({ cursor: nextCursors[tab], q: search })
+      setters[tab]((items) => [...items, ...page.items])
+      setNextCursors((cursors) => ({ ...cursors, [tab]: page.nextCursor }))
+    } catch (error) {
+      console.error('Error loading more features:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleAdd = () => {
     setEditingItem(null)
     setFormName('')
@@ -176,7 +210,7 @@ const FeaturesPage = () => {
                       <span className="text-xl">{config.icon}</span>
                       <span>{config.label}</span>
                       <span className="ml-2 px-2 py-0.5 text-xs bg-gray-100 rounded-full">
-                        {getCurrentData().length}
+                        {getCurrentData().length}{nextCursors[activeTab] ? '+' : ''}
                       </span>
                     </button>
                   )
@@ -203,6 +237,14 @@ const FeaturesPage = () => {
                 </button>
               </div>
 
+              <input
+                type="search"
+                value={search}
+                onChange={(e) => setSearch(e.target.value)}
+                className="w-full mb-6 px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+                placeholder="Search by name"
+              />
+
               {loading ? (
                 <div className="text-center py-12">
                   <div className="text-4xl mb-4 animate-pulse">⏳</div>
@@ -211,7 +253,7 @@ const FeaturesPage = () => {
               ) : getCurrentData().length === 0 ? (
                 <div className="text-center py-12 bg-gray-50 rounded-lg">
                   <div className="text-6xl mb-4">📭</div>
-                  <p className="text-xl text-gray-600 mb-2">No items yet</p>
+                  <p className="text-xl text-gray-600 mb-2">{search ? 'No matches' : 'No items yet'}</p>
                   <p className="text-gray-500 mb-4">Add your first {activeTab} to get started</p>
                   <button
                     onClick={handleAdd}
@@ -253,6 +295,18 @@ const FeaturesPage = () => {
                   ))}
                 </div>
               )}
+
+              {!loading && nextCursors[activeTab] && (
+                <div className="text-center mt-6">
+                  <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="px-6 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition-colors disabled:cursor-not-allowed"
+                  >
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                  </button>
+                </div>
+              )}
             </div>
           </div>
 
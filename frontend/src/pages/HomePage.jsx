@@ -4,18 +4,33 @@ import NewsCard from '../components/NewsCard'
 import { useLanguage } from '../contexts/LanguageContext'
 
 const HomePage = () => {
-  const { t } = useLanguage()
+  const { t, language } = useLanguage()
   const [featuredNews, setFeaturedNews] = useState([])
   const [allNews, setAllNews] = useState([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     fetchNews()
-  }, [])
 
-  const fetchNews = async () => {
+    // Refetch when articles change, spread over a few seconds so open tabs don't all hit at once
+    let timer = null
+    const unsubscribe = newsApi.subscribeToNews(() => {
+      if (!timer) {
+        timer = setTimeout(() => {
+          timer = null
+          fetchNews(false)
+        }, Math.random() * 5000)
+      }
+    })
+    return () => {
+      clearTimeout(timer)
+      unsubscribe()
+    }
+  }, [language])
+
+  const fetchNews = async (showLoading = true) => {
     try {
-      setLoading(true)
+      if (showLoading) setLoading(true)
       const [featured, all] = await Promise.all([
         newsApi.getFeaturedNews(4),
         newsApi.getAllNews(0, 16)